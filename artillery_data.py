@@ -0,0 +1,219 @@
+"""
+Read artillery.io JSON report (artillery run --output report.json), convert to Tsung records.
+
+Report for a long run is hundreds of MB, almost all of it is the `intermediate` array,
+one item per period (10 sec by default):
+{
+  "aggregate": {...},
+  "intermediate": [
+    {
+      "period": "1746469500000",
+      "counters": {"vusers.created": 10, "vusers.completed": 8, "vusers.failed": 0,
+                   "http.requests": 52, "http.codes.200": 50, "http.codes.500": 2,
+                   "http.downloaded_bytes": 123456, "errors.ETIMEDOUT": 1},
+      "rates": {"http.request_rate": 5},
+      "summaries": {"http.response_time": {"min": 12, "max": 480, "count": 52, "mean": 95.4, "p50": 80.6, ...},
+                    "plugins.metrics-by-endpoint.response_time./v1/login": {"min": 12, "max": 480, "count": 10, ...}}
+    },
+    ...
+  ]
+}
+Items of `intermediate` are read one by one with incremental JSON decoder (iter_json_array),
+the whole document is never loaded.
+
+Mapping to tsung names (Artillery.process, tables and charts are the same as for Tsung):
+    summaries plugins.metrics-by-endpoint.response_time.<endpoint>  -> transaction <endpoint>
+    summaries http.response_time                                    -> main 'request'
+    counters http.codes.<code>                                      -> http '<code>'
+    counters errors.<error>                                         -> error 'error_<error>'
+    counters http.downloaded_bytes                                  -> network 'size_rcv'
+    counters vusers.created, vusers.completed                       -> users 'users_count', 'finish_users_count'
+    vusers.created - vusers.completed - vusers.failed (running sum) -> users 'users'
+Counters are omitted by artillery for periods without events, such periods are 0, not gaps.
+"""
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TextIO
+
+from tsung_data import CounterRecords, DataRecords, Tsung
+
+WHITESPACE = re.compile(r'\s*')
+
+
+class JsonStream:
+    """Incremental reader of JSON values from text file, keeps only not decoded part of file in memory."""
+
+    def __init__(self, fin: TextIO, chunk_size: int = 1 << 16):
+        self.fin = fin
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def read_more(self, size: int) -> bool:
+        """Drop decoded part of buffer and read size chars more, False at the end of file."""
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = self.fin.read(size)
+        self.buffer += chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """Skip whitespaces and return the next char, '' at the end of file."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more(self.chunk_size):
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume one of chars (after whitespaces) and return it."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'Wrong JSON: expected one of "{chars}", got "{self.buffer[self.pos:self.pos + 20]}"')
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value, read more of file until the value is complete."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.read_more(size):
+                    raise
+                size *= 2
+                continue
+            # number at the end of buffer may be cut: "12" of "1234"
+            if end == len(self.buffer) and self.read_more(size):
+                size *= 2
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(fin: TextIO, key: str, chunk_size: int = 1 << 16) -> Iterator:
+    """Yield items of the top-level array `key` one by one, other top-level values are skipped."""
+    stream = JsonStream(fin, chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        name = stream.value()
+        stream.expect(':')
+        if name == key:
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def period_timestamp(item: dict) -> int:
+    """Start of the period in sec, artillery writes it in msec."""
+    if 'period' in item:
+        return int(item['period']) // 1000
+    return int(item['firstCounterAt']) // 1000
+
+
+class Artillery(Tsung):
+    DATA_FILE_NAME = 'report.json'
+    PREFIX_ENDPOINT_TIME = 'plugins.metrics-by-endpoint.response_time.'
+    PREFIX_HTTP_CODE = 'http.codes.'
+    PREFIX_ERROR = 'errors.'
+    COUNTERS = {
+        'http.downloaded_bytes': ('size_rcv', 'network'),
+        'vusers.created': ('users_count', 'users'),
+        'vusers.completed': ('finish_users_count', 'users'),
+    }
+
+    def __init__(self):
+        super().__init__()
+        # artillery has no tcp/ip connection and page statistics
+        self.names['main'] = ('request',)
+        self.names['network'] = ('size_rcv',)
+        self.names['users'] = ('users', 'users_count', 'finish_users_count')
+        # name -> category, known from artillery metric name
+        self.categories: dict[str, str] = {}
+
+    def counter_name(self, key: str) -> tuple[str, str] | None:
+        """(name, category) for artillery counter, None if counter is not used in report."""
+        if key.startswith(self.PREFIX_HTTP_CODE):
+            return key[len(self.PREFIX_HTTP_CODE):], 'http'
+        if key.startswith(self.PREFIX_ERROR):
+            return 'error_' + key[len(self.PREFIX_ERROR):], 'error'
+        return self.COUNTERS.get(key)
+
+    def summary_name(self, key: str) -> tuple[str, str] | None:
+        """(name, category) for artillery summary, None if summary is not used in report."""
+        if key.startswith(self.PREFIX_ENDPOINT_TIME):
+            return key[len(self.PREFIX_ENDPOINT_TIME):], 'transaction'
+        if key == 'http.response_time':
+            return 'request', 'main'
+        return None
+
+    def add_counter(self, block: int, name: str, category: str, count: int, totals: dict[str, int]):
+        """Add count of the period and total count since test start of counter name."""
+        self.categories[name] = category
+        totals[name] = totals.get(name, 0) + count
+        self.add_records(name, CounterRecords).append(block, [count, totals[name]])
+
+    def parse(self, path: str | Path):
+        """Parse artillery JSON report, path is report file or directory with report.json."""
+        filename = Path(path).resolve()
+        if filename.is_dir():
+            filename = filename / self.DATA_FILE_NAME
+        totals = {}    # counter name -> count since test start
+        counts = {}    # summary name -> count before this period
+        active_users = 0
+        self.categories['users'] = 'users'
+        with open(filename, 'r') as fin:
+            for block, item in enumerate(iter_json_array(fin, 'intermediate')):
+                self.timestamps.append(period_timestamp(item))
+
+                seen = set()
+                counters = item.get('counters', {})
+                for key, count in counters.items():
+                    name_category = self.counter_name(key)
+                    if name_category:
+                        self.add_counter(block, *name_category, count, totals)
+                        seen.add(name_category[0])
+                # artillery omits counters without events in this period
+                for name in totals.keys() - seen:
+                    self.add_counter(block, name, self.categories[name], 0, totals)
+
+                # simultaneous users, as tsung 'users 26 26'
+                active_users += (counters.get('vusers.created', 0) - counters.get('vusers.completed', 0)
+                                 - counters.get('vusers.failed', 0))
+                self.add_records('users', CounterRecords).append(block, [active_users, active_users])
+
+                for key, summary in item.get('summaries', {}).items():
+                    name_category = self.summary_name(key)
+                    if not name_category:
+                        continue
+                    name, category = name_category
+                    self.categories[name] = category
+                    count_before = counts.get(name, 0)
+                    counts[name] = count_before + summary['count']
+                    # count_10sec mean_10sec stddev_10sec max min mean count, no stddev in artillery
+                    self.add_records(name, DataRecords).append(block, [
+                        summary['count'], summary['mean'], 0, summary['max'], summary['min'],
+                        summary['mean'], count_before])
+
+    def add_name_by_category(self, name: str):
+        """Add name to self.names by category of artillery metric."""
+        category = self.categories.get(name)
+        if category and isinstance(self.names[category], set):
+            self.names[category].add(name)
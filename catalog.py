@@ -0,0 +1,127 @@
+"""
+Persistent catalog of test runs for trends across runs.
+
+After each report the summary rows (Tsung.summary / Locust.summary, the same values as report tables)
+are added to a local sqlite database:
+    runs    - id, scenario, framework, path, timestamp (test start), run_date (log directory name)
+    metrics - run_id, scenario, timestamp, table_name, name, metric, value
+metrics is indexed by (scenario, table_name, metric, name, timestamp), so a trend of one metric
+for all transactions over a year of nightly runs is one index range scan, raw logs are never re-opened.
+
+Trend report: for each `table_name.metric` from report.ini [trend] section one chart
+with one line per name, x - days since the first run of the scenario.
+"""
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    framework TEXT NOT NULL,
+    path TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    run_date TEXT NOT NULL,
+    UNIQUE (scenario, path)
+);
+CREATE INDEX IF NOT EXISTS runs_scenario_timestamp ON runs (scenario, timestamp);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    scenario TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    table_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_trend ON metrics (scenario, table_name, metric, name, timestamp);
+CREATE INDEX IF NOT EXISTS metrics_run ON metrics (run_id);
+"""
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class Catalog:
+
+    def __init__(self, filepath: str | Path):
+        self.filepath = Path(filepath)
+        self.connection = sqlite3.connect(self.filepath)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def add_run(self, scenario: str, framework: str, path: str | Path, timestamp: int, run_date: str,
+                summary: dict[str, list[dict]]) -> int:
+        """Add (or replace the same path) run with summary rows {table_name: [{'name': .., metric: value}]}."""
+        rows = [(table_name, row['name'], metric, float(value))
+                for table_name, table_rows in summary.items()
+                for row in table_rows
+                for metric, value in row.items()
+                if metric != 'name' and isinstance(value, int | float)]
+        with self.connection:
+            self.connection.execute('DELETE FROM runs WHERE scenario = ? AND path = ?', (scenario, str(path)))
+            run_id = self.connection.execute(
+                'INSERT INTO runs (scenario, framework, path, timestamp, run_date) VALUES (?, ?, ?, ?, ?)',
+                (scenario, framework, str(path), timestamp, run_date)).lastrowid
+            self.connection.executemany(
+                'INSERT INTO metrics (run_id, scenario, timestamp, table_name, name, metric, value) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((run_id, scenario, timestamp, *row) for row in rows))
+        print(f'... added run {run_date} to {self.filepath.name} ({len(rows)} metrics)', file=sys.stderr)
+        return run_id
+
+    def runs(self, scenario: str, since: int = 0) -> list[tuple[int, str, str]]:
+        """[(timestamp, run_date, path)] of scenario runs since timestamp, ordered by time."""
+        return self.connection.execute(
+            'SELECT timestamp, run_date, path FROM runs WHERE scenario = ? AND timestamp >= ? ORDER BY timestamp',
+            (scenario, since)).fetchall()
+
+    def trend(self, scenario: str, table_name: str, metric: str, since: int = 0) -> dict[str, dict[int, float]]:
+        """{name: {run timestamp: value}} of one metric for all names of the table."""
+        result = {}
+        for name, timestamp, value in self.connection.execute(
+                'SELECT name, timestamp, value FROM metrics '
+                'WHERE scenario = ? AND table_name = ? AND metric = ? AND timestamp >= ? '
+                'ORDER BY name, timestamp',
+                (scenario, table_name, metric, since)):
+            result.setdefault(name, {})[timestamp] = value
+        return result
+
+    def trend_report(self, scenario: str, trend_list: list[str], since: int = 0) -> tuple[dict, dict]:
+        """Tables and charts for create_report: runs table and one chart per 'table_name.metric'."""
+        runs = self.runs(scenario, since)
+        timestamps = [timestamp for timestamp, _, _ in runs]
+        start = timestamps[0] if timestamps else 0
+        labels = [round((timestamp - start) / SECONDS_PER_DAY, 2) for timestamp in timestamps]
+
+        tables = {
+            'runs': {
+                'title': f'Runs of {scenario}',
+                'header': ['Date', 'Path'],
+                'data': [[run_date, path] for _, run_date, path in runs],
+            }
+        }
+        charts = {}
+        for trend_name in trend_list:
+            table_name, metric = trend_name.split('.', 1)
+            lines_data = []
+            for name, values in sorted(self.trend(scenario, table_name, metric, since).items()):
+                lines_data.append({
+                    "label": name,
+                    "fill": False,
+                    "tension": 0,
+                    "data": [values.get(timestamp) for timestamp in timestamps]
+                })
+            charts[trend_name.replace('.', '_')] = {
+                'title': f'{table_name} {metric.replace("_", " ")}',
+                'xheader': 'days since the first run',
+                'yheader': metric.replace('_', ' '),
+                'data': lines_data,
+                'json': json.dumps(lines_data),
+                'labels': json.dumps(labels),
+            }
+        return tables, charts
@@ -0,0 +1,363 @@
+"""
+Parser regression check: every parsing mode gives the same records as a plain reference parser,
+and parsing throughput (MB/s) of every mode.
+
+python check_parsers.py                         # corpus log_examples/
+python check_parsers.py logs/run1/tsung.log logs/run2/report.json    # and larger logs of real runs
+
+Corpus (log_examples/):
+    tsung_data/multinode/tsung.log      - cpu/load/freemem of several nodes, a node missing in some blocks
+    tsung_data/edge_cases/tsung.log     - lines before the first header, missing dump blocks (gap on time axis),
+                                          zero-count transactions, names missing in some blocks, duplicate
+                                          names in a block, unknown names, names classified by different rules
+                                          in Tsung.records_for_word and Tsung.add_name_by_category
+                                          ('error_nomatch_retry', 'connection_error', 'tr_match_list')
+    tsung_data/skipped_blocks/tsung.log - the first step is a skipped block (steps 20, 10, 10, 20, 20):
+                                          values keep their timestamps, no two blocks share a row
+    tsung_data/jitter/tsung.log         - dump drift (steps of 10 sec, one of 11 and one of 9): interval is 10,
+                                          timestamps are snapped to the nearest 10 sec row
+    locust_data/short_full_data_stats_history.csv
+                                        - N/A rows, Aggregated rows, all 11 percentile columns
+    artillery_data/report.json          - escaped quotes, brackets and unicode in strings, empty period
+
+Modes:
+    tsung       reference - line by line into block dicts, names classified by rules written out below
+                fast      - Tsung.parse (typed arrays, names classified once) + Tsung.process
+    locust      reference - csv.DictReader
+                fast      - Locust.parse of one file
+                merged    - Locust.parse of the file split into time segments (several files, k-way merge);
+                            two identical worker files: rates are doubled, percentiles are the same
+    artillery   reference - json.load of the whole report, metrics mapped to tsung names by rules written out below
+                streaming - iter_json_array with small and default chunks
+                fast      - Artillery.parse (streaming) + Artillery.process
+
+Exit code 1 if any mode differs from the reference.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from artillery_data import Artillery, iter_json_array
+from locust_data import CSV_HEADERS, RPS_WEIGHTED_HEADERS, Locust
+from server import run_framework
+from tsung_data import Tsung
+from utils import number
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'log_examples'
+# parse the file again and again for at least MIN_SECONDS to measure throughput
+MIN_SECONDS = 0.5
+LOCUST_SEGMENTS = 3
+# chunk sizes of streaming JSON reader, 1 char splits every token
+CHUNK_SIZES = (1, 7, 4096, 1 << 16)
+
+
+def quiet(fn, *args):
+    """Call fn without its debug prints (stderr) and progress messages."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return fn(*args)
+
+
+def throughput(fn, path: Path) -> float:
+    """MB/s of fn(path), repeated for at least MIN_SECONDS, path is file or directory of files."""
+    size = sum(file.stat().st_size for file in path.iterdir()) if path.is_dir() else path.stat().st_size
+    repeats = 0
+    start = time.perf_counter()
+    while True:
+        quiet(fn, path)
+        repeats += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return size * repeats / elapsed / (1 << 20)
+
+
+def first_difference(expected: list, actual: list) -> str:
+    """Text of the first different item, '' if lists are equal."""
+    for i, (expected_item, actual_item) in enumerate(zip(expected, actual)):
+        if expected_item != actual_item:
+            return f'item {i}: expected {expected_item}, got {actual_item}'
+    if len(expected) != len(actual):
+        return f'expected {len(expected)} items, got {len(actual)}'
+    return ''
+
+
+# tsung
+
+def tsung_kind(word: str, names: dict) -> str | None:
+    """'data' (8 fields), 'counter' (3 fields) or None (line is skipped) by the first word of tsung.log line."""
+    if word.startswith('tr_'):
+        return 'data'
+    if word.isdigit() or 'match' in word or 'error' in word or word in names['users'] or word in names['network']:
+        return 'counter'
+    if word in names['main'] or word.startswith('{'):
+        return 'data'
+    return None
+
+
+def tsung_category(name: str, names: dict) -> str | None:
+    """Report category of parsed name, None if the name is not in report."""
+    for category in ('main', 'network', 'users'):
+        if name in names[category]:
+            return category
+    if name.startswith('tr_'):
+        return 'transaction'
+    if name.isdigit():
+        return 'http'
+    if name.startswith('error_'):
+        return 'error'
+    if 'match' in name:
+        return 'match'
+    for category in ('cpu', 'load', 'freemem'):
+        if name.startswith(category):
+            return category
+    # 'connection_error' is parsed as error counter, but it is not in any category
+    return None
+
+
+def snapped_timestamps(timestamps: list[int]) -> dict[int, int]:
+    """timestamp -> timestamp of its time axis row, rules of timeaxis.py written out."""
+    timestamps = sorted(set(timestamps))
+    steps = [b - a for a, b in zip(timestamps, timestamps[1:])]
+    # the most common step (the smaller of equally common) every step is a whole number of, +- a quarter
+    fits = [step for step in sorted(set(steps), key=lambda s: (-steps.count(s), s))
+            if all(abs(other - max(1, round(other / step)) * step) <= step / 4 for other in steps)]
+    interval = fits[0] if fits else 10
+    result = {}
+    row = -1
+    for timestamp in timestamps:
+        # nearest row, a half rounds up, a taken row -> the next one
+        row = max(math.floor((timestamp - timestamps[0]) / interval + 0.5), row + 1)
+        result[timestamp] = timestamps[0] + row * interval
+    return result
+
+
+def tsung_reference(path: Path) -> list[tuple]:
+    """(category, name, timestamp, count, mean) of every name in every block, the last line of a name wins,
+    timestamps are snapped to the time axis."""
+    names = Tsung().names
+    blocks = []    # [(timestamp, {name: (kind, words)})]
+    with open(path, 'r') as fin:
+        for line in fin:
+            line = line.strip()
+            if line.startswith(Tsung.PREFIX_HEADER):
+                blocks.append((int(line[len(Tsung.PREFIX_HEADER):]), {}))
+            elif line and blocks:
+                word, *words = line[len('stats: '):].split()
+                kind = tsung_kind(word, names)
+                if kind is None:
+                    continue
+                if word.startswith('{'):
+                    # {cpu,"db1"} -> cpu@db1
+                    metric, node = word[1:-1].split(',', 1)
+                    word = f'{metric}@{node.strip(chr(34))}'
+                blocks[-1][1][word] = (kind, words)
+    snapped = snapped_timestamps([timestamp for timestamp, _ in blocks])
+    result = []
+    for timestamp, block in blocks:
+        for name, (kind, words) in block.items():
+            category = tsung_category(name, names)
+            if category is not None:
+                mean = float(words[1]) if kind == 'data' else None
+                result.append((category, name, snapped[timestamp], int(words[0]), mean))
+    return sorted(result)
+
+
+def tsung_fast(path: Path) -> list[tuple]:
+    tsung = Tsung()
+    tsung.parse(path.parent)
+    tsung.process()
+    return sorted(zip(*tsung.columns().values()))
+
+
+# locust
+
+def locust_reference(path: Path) -> list[dict]:
+    """Records of history file without N/A and Aggregated rows, in file order."""
+    data = []
+    with open(path, 'r') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if 'N/A' in row.values() or row['Name'] == 'Aggregated':
+                continue
+            record = {'timestamp': int(row['Timestamp']), 'name': row['Name'], 'type': row['Type']}
+            record.update((CSV_HEADERS[header], number(value)) for header, value in row.items() if header in CSV_HEADERS)
+            data.append(record)
+    data.sort(key=lambda record: record['timestamp'])
+    return data
+
+
+def locust_fast(path: Path) -> list[dict]:
+    locust = Locust()
+    locust.parse(path)
+    return locust.data
+
+
+def locust_segments(path: Path, directory: Path, segments: int = LOCUST_SEGMENTS) -> Path:
+    """Split history file into files of consecutive time segments (as a restarted run), return directory."""
+    with open(path, 'r') as fin:
+        header, *lines = fin.readlines()
+    timestamps = sorted({line.split(',', 1)[0] for line in lines})
+    size = -(-len(timestamps) // segments)
+    for segment in range(segments):
+        segment_timestamps = set(timestamps[segment * size:(segment + 1) * size])
+        with open(directory / f'segment{segment}_stats_history.csv', 'w') as fout:
+            fout.write(header)
+            fout.writelines(line for line in lines if line.split(',', 1)[0] in segment_timestamps)
+    return directory
+
+
+def locust_workers(path: Path, directory: Path) -> Path:
+    """Two workers with the same history file, return directory."""
+    for worker in ('worker1', 'worker2'):
+        shutil.copyfile(path, directory / f'{worker}_stats_history.csv')
+    return directory
+
+
+def locust_merged(directory: Path) -> list[dict]:
+    locust = Locust()
+    locust.parse(directory)
+    return locust.data
+
+
+def same_merged(single: dict, merged: dict) -> bool:
+    """Record of two identical workers: rates and counts doubled, percentiles and means the same."""
+    for key, value in single.items():
+        if key in ('timestamp', 'name', 'type'):
+            expected = value
+        elif key in ('user_count', 'rps', 'fail_rps', 'total_count', 'total_falure_count'):
+            expected = 2 * value
+        else:
+            expected = value
+        if isinstance(expected, str):
+            if merged.get(key) != expected:
+                return False
+        elif merged.get(key) is None or not math.isclose(merged[key], expected, rel_tol=1e-9):
+            return False
+    return True
+
+
+# artillery
+
+def artillery_reference(path: Path) -> list[dict]:
+    with open(path, 'r') as fin:
+        return json.load(fin)['intermediate']
+
+
+def artillery_records(items: list[dict]) -> list[tuple]:
+    """(category, name, timestamp, count, mean) of intermediate items, mapped as documented in artillery_data.py."""
+    counters = {'http.downloaded_bytes': ('network', 'size_rcv'), 'vusers.created': ('users', 'users_count'),
+                'vusers.completed': ('users', 'finish_users_count')}
+    endpoint_prefix = 'plugins.metrics-by-endpoint.response_time.'
+    result = []
+    seen = set()    # counters seen in this or earlier periods, 0 if omitted later
+    users = 0
+    for item in items:
+        timestamp = int(item.get('period', item.get('firstCounterAt'))) // 1000
+        period_counters = {}
+        for key, count in item.get('counters', {}).items():
+            if key.startswith('http.codes.'):
+                period_counters['http', key[len('http.codes.'):]] = count
+            elif key.startswith('errors.'):
+                period_counters['error', 'error_' + key[len('errors.'):]] = count
+            elif key in counters:
+                period_counters[counters[key]] = count
+        seen |= period_counters.keys()
+        result.extend((category, name, timestamp, period_counters.get((category, name), 0), None)
+                      for category, name in seen)
+        counts = item.get('counters', {})
+        users += counts.get('vusers.created', 0) - counts.get('vusers.completed', 0) - counts.get('vusers.failed', 0)
+        result.append(('users', 'users', timestamp, users, None))
+        for key, summary in item.get('summaries', {}).items():
+            if key.startswith(endpoint_prefix):
+                result.append(('transaction', key[len(endpoint_prefix):], timestamp, summary['count'], float(summary['mean'])))
+            elif key == 'http.response_time':
+                result.append(('main', 'request', timestamp, summary['count'], float(summary['mean'])))
+    return sorted(result)
+
+
+def artillery_streaming(path: Path, chunk_size: int = 1 << 16) -> list[dict]:
+    with open(path, 'r') as fin:
+        return list(iter_json_array(fin, 'intermediate', chunk_size))
+
+
+def artillery_fast(path: Path) -> list[tuple]:
+    artillery = Artillery()
+    artillery.parse(path)
+    artillery.process()
+    return sorted(zip(*artillery.columns().values()))
+
+
+def check(path: Path, framework: str) -> tuple[list[str], dict[str, float]]:
+    """(errors, {mode: MB/s}) of log file."""
+    errors = []
+    speed = {}
+
+    def compare(mode: str, expected: list, actual: list):
+        difference = first_difference(expected, actual)
+        if difference:
+            errors.append(f'{path} {mode}: {difference}')
+
+    match framework:
+        case 'tsung':
+            compare('fast', tsung_reference(path), quiet(tsung_fast, path))
+            speed['reference'] = throughput(tsung_reference, path)
+            speed['fast'] = throughput(tsung_fast, path)
+        case 'locust':
+            expected = locust_reference(path)
+            compare('fast', expected, quiet(locust_fast, path))
+            with tempfile.TemporaryDirectory() as directory:
+                segments = locust_segments(path, Path(directory))
+                compare('merged', expected, quiet(locust_merged, segments))
+                speed['merged'] = throughput(locust_merged, segments)
+            with tempfile.TemporaryDirectory() as directory:
+                merged = quiet(locust_merged, locust_workers(path, Path(directory)))
+                if len(merged) != len(expected) or not all(map(same_merged, expected, merged)):
+                    errors.append(f'{path} merged workers: records of identical workers are merged wrong')
+                if any(record[header] is None for record in merged for header in RPS_WEIGHTED_HEADERS):
+                    errors.append(f'{path} merged workers: percentile is lost')
+            speed['reference'] = throughput(locust_reference, path)
+            speed['fast'] = throughput(locust_fast, path)
+        case 'artillery':
+            expected = artillery_reference(path)
+            for chunk_size in CHUNK_SIZES:
+                compare(f'streaming chunk {chunk_size}', expected, artillery_streaming(path, chunk_size))
+            compare('fast', artillery_records(expected), quiet(artillery_fast, path))
+            speed['reference'] = throughput(artillery_reference, path)
+            speed['streaming'] = throughput(artillery_streaming, path)
+            speed['fast'] = throughput(artillery_fast, path)
+    return errors, speed
+
+
+def corpus_files(root: Path) -> list[tuple[Path, str]]:
+    """(log file, framework) of all logs under root."""
+    return sorted((path, run_framework(path.name)) for path in root.rglob('*') if run_framework(path.name))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check parsers against reference parsers and measure throughput.')
+    parser.add_argument('paths', nargs='*', type=Path, help='more log files: tsung.log, report.json, *_stats_history.csv')
+    args = parser.parse_args()
+
+    files = corpus_files(CORPUS_DIR)
+    for path in args.paths:
+        framework = run_framework(path.name)
+        if not framework:
+            parser.error(f'Unknown log file {path}')
+        files.append((path, framework))
+
+    all_errors = []
+    for path, framework in files:
+        errors, speed = check(path, framework)
+        all_errors.extend(errors)
+        status = 'FAIL' if errors else 'ok'
+        modes = ', '.join(f'{mode} {mb_per_sec:.1f} MB/s' for mode, mb_per_sec in speed.items())
+        print(f'{status:4} {framework:9} {path.stat().st_size >> 10:6} KB  {path}: {modes}')
+    for error in all_errors:
+        print(error)
+    sys.exit(1 if all_errors else 0)
@@ -0,0 +1,86 @@
+"""
+Lagged cross-correlation of server monitoring series (cpu, load, freemem of every node)
+with transaction latency (mean_10sec) and error rates: does latency follow cpu@db1, and with which lag?
+
+For every pair (resource, target) and lag 0..max_lag rows:
+    r(lag) = sum(zx[t] * zy[t + lag]) / n
+zx, zy - series standardized once (z-scores, gaps are the series mean, i.e. 0), n - number of rows.
+Standardized series are stacked into matrices X (resources x rows) and Y (targets x rows),
+so correlations of all pairs for one lag are one block product:
+    R(lag) = X[:, :n - lag] @ Y[:, lag:].T / n
+It is one numpy matrix product per lag: 150 resources x 150 targets, 1000 rows, 7 lags is ~0.1 s.
+numpy is needed for the correlation table only (as pyarrow for export): a dot product per pair and lag
+in pure python is resources x targets x lags x rows multiplications, ~45 s for a day of 10 sec dumps.
+Tsung caches correlations of the run and of every phase, so tables, export and catalog of one report
+compute them once.
+The lag with the strongest |r| is kept for each pair, the strongest pairs are the report table:
+    tr_cb_login latency follows cpu@db1 with a 20 s lag
+"""
+import math
+
+MAX_LAG = 60    # sec
+MIN_CORRELATION = 0.5
+MAX_CORRELATIONS = 20
+# series with less values are not correlated
+MIN_VALUES = 10
+
+
+def standardize(values: list) -> list[float] | None:
+    """z-scores of values, gaps are 0 (the mean), None if series is too short or constant."""
+    present = [value for value in values if value is not None]
+    if len(present) < MIN_VALUES:
+        return None
+    mean = math.fsum(present) / len(present)
+    std = math.sqrt(math.fsum((value - mean) ** 2 for value in present) / len(present))
+    if std <= 1e-12 * max(1.0, abs(mean)):
+        return None
+    return [0.0 if value is None else (value - mean) / std for value in values]
+
+
+def block_correlations(x: list[list[float]], y: list[list[float]], lags: range) -> tuple[list, list]:
+    """(best lag, r) matrices (len(x) x len(y)) with the strongest |r| of lags, one block product per lag."""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError('Table correlation needs numpy: pip install numpy') from None
+    n = len(y[0])
+    x, y = numpy.array(x), numpy.array(y)
+    best = numpy.zeros((len(x), len(y)))
+    best_lag = numpy.zeros((len(x), len(y)), dtype=int)
+    for lag in lags:
+        r = x[:, :n - lag] @ y[:, lag:].T / n
+        stronger = numpy.abs(r) > numpy.abs(best)
+        best[stronger] = r[stronger]
+        best_lag[stronger] = lag
+    return best_lag.tolist(), best.tolist()
+
+
+def cross_correlations(resources: dict[str, list], targets: dict[str, list], max_lag: int) -> list[tuple[str, str, int, float]]:
+    """(resource, target, lag rows, r) with the strongest |r| of lags 0..max_lag for every pair.
+
+    Positive lag - target follows resource: resource[t] is compared with target[t + lag].
+    """
+    standard_resources = {name: z for name, values in resources.items() if (z := standardize(values))}
+    standard_targets = {name: z for name, values in targets.items() if (z := standardize(values))}
+    if not standard_resources or not standard_targets:
+        return []
+    n = len(next(iter(standard_targets.values())))
+    lags = range(min(max_lag, n - 1) + 1)
+    best_lag, best = block_correlations(list(standard_resources.values()), list(standard_targets.values()), lags)
+    return [(resource, target, best_lag[i][j], best[i][j])
+            for j, target in enumerate(standard_targets)
+            for i, resource in enumerate(standard_resources)]
+
+
+def strongest(correlations: list[tuple[str, str, int, float]], limit: int = MAX_CORRELATIONS,
+              min_correlation: float = MIN_CORRELATION) -> list[tuple[str, str, int, float]]:
+    """The strongest relationships by |r|, at most limit."""
+    correlations = [item for item in correlations if abs(item[3]) >= min_correlation]
+    correlations.sort(key=lambda item: (-abs(item[3]), item[1], item[0]))
+    return correlations[:limit]
+
+
+def relationship(name: str, kind: str, resource: str, lag: int, correlation: float) -> str:
+    """Text of the relationship: 'tr_cb_login latency follows cpu@db1 with a 20 s lag'."""
+    text = f'{name} {kind} follows {resource} with a {lag} s lag' if lag else f'{name} {kind} moves with {resource}'
+    return text if correlation > 0 else f'{text} (inverse)'
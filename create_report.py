@@ -1,14 +1,45 @@
 import argparse
 import configparser
+import gzip
+import sys
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
 
+from artillery_data import Artillery
+from catalog import Catalog
+from export import EXPORT_FORMATS, export
 from locust_data import Locust
+from phases import phase_tables
+from server import DEFAULT_MAX_MB, DEFAULT_MAX_RUNS, Settings, serve
+from sla import check, parse_rules
 from tsung_data import Tsung
 
 base_dir = Path(__file__).parent
+# Chart.js 4, if it is put to vendor/, otherwise the bundled renderer of the same API (line charts only)
+CHART_JS_PATH = base_dir / 'vendor' / 'chart.umd.min.js'
+CHART_JS_LITE_PATH = base_dir / 'vendor' / 'chart.lite.js'
+CHART_JS_URL = 'https://cdn.jsdelivr.net/npm/chart.js@4/dist/chart.umd.min.js'
+CDN_HOST = 'cdn.jsdelivr.net'
+
+def read_chart_js(filepath: Path | None = None) -> str:
+    """Chart library for offline reports, the CDN is not used.
+
+    filepath - Chart.js file (--chart-js), default vendor/chart.umd.min.js if it is there, else vendor/chart.lite.js.
+    """
+    if filepath is None:
+        filepath = CHART_JS_PATH if CHART_JS_PATH.is_file() else CHART_JS_LITE_PATH
+    if not filepath.is_file():
+        raise FileNotFoundError(
+            f'{filepath} not found: pass minified Chart.js 4 with --chart-js, download it on a machine with network access: '
+            f'curl -L -o {filepath} {CHART_JS_URL}')
+    # library is inlined into <script>, it must not close the tag
+    return filepath.read_text(encoding='utf-8').replace('</script', '<\\/script')
+
+def create_report(report_dirname: Path, report_date: str, tables: dict, charts: dict,
+                  chart_js: str | None = None, compress: bool = False):
+    """Write report_<date>.html, chart_js - inline library instead of CDN, compress - write .html.gz."""
+    # jinja2 is not needed for --check mode
+    from jinja2 import Environment, FileSystemLoader
 
-def create_report(report_dirname: Path, report_date: str, tables: dict, charts: dict):
     environment = Environment(loader=FileSystemLoader(base_dir / "templates/"))
     template = environment.get_template("main.html")
 
@@ -16,20 +47,64 @@ def create_report(report_dirname: Path, report_date: str, tables: dict, charts:
     content = template.render(
         title = report_date,
         tables=tables,
-        charts=charts
+        charts=charts,
+        chart_js=chart_js
     )
+    if chart_js and CDN_HOST in content:
+        raise ValueError(f'Offline report refers to {CDN_HOST}, it would not open without network')
+    if compress:
+        filename += '.gz'
+        # mtime=0: the same report gives the same file
+        with open(report_dirname / filename, mode="wb") as fout:
+            with gzip.GzipFile(fileobj=fout, mode="wb", compresslevel=9, mtime=0) as message:
+                message.write(content.encode("utf-8"))
+        print(f"... wrote {filename}")
+        return
     with open(report_dirname / filename, mode="w", encoding="utf-8") as message:
         message.write(content)
         print(f"... wrote {filename}")
 
+def add_to_catalog(catalog_path: Path, scenario: str, framework: str, report, log_dirname: Path, report_date: str,
+                   table_list: list[str]):
+    """Add summary rows of processed report to the catalog of runs for trend report."""
+    catalog = Catalog(catalog_path)
+    try:
+        catalog.add_run(scenario, framework, log_dirname, report.start_timestamp, report_date, report.summary(table_list))
+    finally:
+        catalog.close()
+
 if __name__ == "__main__":
 
     argparser = argparse.ArgumentParser()
 
-    argparser.add_argument("framework", help='Choose framework: tsung, locust')
+    argparser.add_argument("framework", help='Choose framework: tsung, locust, artillery, trend (report by catalog of runs) or serve (local report server)')
 
-    argparser.add_argument("dirname", help='Path to directory with tsung.log file')
+    argparser.add_argument("dirname", help='Path to directory with tsung.log file (locust: *_stats_history.csv file, directory or glob, artillery: report.json or its directory, trend: directory for report, serve: directory with runs)')
+    argparser.add_argument("--export", action='append', choices=EXPORT_FORMATS, default=[],
+                           help='Also export series and summary tables (may be repeated)')
+    argparser.add_argument("--catalog", help='Catalog of runs (sqlite file), default [catalog] path from report.ini')
+    argparser.add_argument("--scenario", help='Scenario name in catalog, default [catalog] scenario from report.ini')
+    argparser.add_argument("--check", action='store_true',
+                           help='Check [sla] thresholds from report.ini instead of report, exit code 1 if failed')
+    argparser.add_argument("--json", type=Path, help='--check: write results to JSON file instead of stdout')
+    argparser.add_argument("--junit", type=Path, help='--check: also write results as JUnit XML file')
+    argparser.add_argument("--host", default='127.0.0.1', help='serve: address to listen')
+    argparser.add_argument("--port", type=int, default=8000, help='serve: port to listen')
+    argparser.add_argument("--max-runs", type=int, default=DEFAULT_MAX_RUNS, help='serve: parsed runs kept in memory')
+    argparser.add_argument("--max-mb", type=int, default=DEFAULT_MAX_MB,
+                           help='serve: total size of log files of parsed runs kept in memory, MB')
+    argparser.add_argument("--offline", action='store_true',
+                           help='Inline vendored Chart.js into report instead of loading it from CDN')
+    argparser.add_argument("--chart-js", type=Path,
+                           help=f'--offline: minified Chart.js file, default {CHART_JS_PATH.relative_to(base_dir)} '
+                                f'or bundled {CHART_JS_LITE_PATH.relative_to(base_dir)}')
+    argparser.add_argument("--gzip", action='store_true', help='Write precompressed report_<date>.html.gz')
     args = argparser.parse_args()
+    try:
+        chart_js = read_chart_js(args.chart_js) if args.offline else None
+    except FileNotFoundError as error:
+        argparser.error(str(error))
+    bundle = {'chart_js': chart_js, 'compress': args.gzip}
     log_dirname = Path(args.dirname).resolve().absolute()
     log_datetime = log_dirname.name
 
@@ -39,20 +114,92 @@ if __name__ == "__main__":
     if not file.exists():
         file = base_dir / file
     config.read(file)
+    # chart_name = window [rolling_function rolling_window], see resample.py
+    windows = dict(config['resample']) if config.has_section('resample') else {}
+    # add every run to catalog for trend report, if catalog path is set
+    catalog_path = args.catalog or config.get('catalog', 'path', fallback=None)
+    scenario = args.scenario or config.get('catalog', 'scenario', fallback=None) or 'default'
+    trend_list = list(config['trend']) if config.has_section('trend') else []
+    # tables for catalog: report tables and tables of trend charts
+    catalog_tables = list(dict.fromkeys(list(config['tables']) + [name.split('.')[0] for name in trend_list]))
+    # group = glob patterns or re:regex, see groups.py
+    transaction_groups = dict(config['tr_groups']) if config.has_section('tr_groups') else {}
+    # tables for every test phase (ramp-up, plateau, ramp-down), see phases.py
+    phase_list = list(config['phases']) if config.has_section('phases') else []
+    # table_name.metric[.name] = max|min value, see sla.py
+    sla_rules = parse_rules(dict(config['sla']) if config.has_section('sla') else {})
+    if args.check and not sla_rules:
+        argparser.error('--check needs [sla] section in report.ini')
+    passed = True
 
     match args.framework:
         case 'tsung':
             tsung = Tsung()
             tsung.parse(log_dirname)
-            tsung.process(ignore_transactions=set(config['tr_ignore']))
-            create_report(log_dirname, log_datetime, tsung.tables(list(config['tables'])), tsung.charts(list(config['charts'])))
+            tsung.process(ignore_transactions=set(config['tr_ignore']), transaction_groups=transaction_groups)
+            if args.check:
+                passed = check(tsung, sla_rules, args.json, args.junit)
+            else:
+                create_report(log_dirname, log_datetime, tsung.tables(list(config['tables'])) | phase_tables(tsung, phase_list), tsung.charts(list(config['charts']), windows), **bundle)
+            if args.export:
+                export(tsung, log_dirname, log_datetime, args.export, list(config['tables']))
+            if catalog_path:
+                add_to_catalog(Path(catalog_path), scenario, 'tsung', tsung, log_dirname, log_datetime, catalog_tables)
 
         case 'locust':
+            # one history file, directory with *_stats_history.csv files (per worker) or glob pattern
+            report_dirname = log_dirname if log_dirname.is_dir() else log_dirname.parent
+            report_date = log_datetime if log_dirname.exists() else report_dirname.name
             locust = Locust()
             locust.parse(log_dirname)
             # locust.process(ignore_transactions=set(config['tr_ignore']))
             locust.process()
             charts_names = ['transactions_rate', 'transactions_p50']
             # create_report(log_dirname, log_datetime, locust.tables(list(config['tables'])), locust.charts(list(config['charts'])))
-            create_report(log_dirname.parent, log_datetime, locust.tables(list(config['tables'])), locust.charts(charts_names))
+            if args.check:
+                passed = check(locust, sla_rules, args.json, args.junit)
+            else:
+                create_report(report_dirname, report_date, locust.tables(list(config['tables'])) | phase_tables(locust, phase_list), locust.charts(charts_names, windows), **bundle)
+            if args.export:
+                export(locust, report_dirname, report_date, args.export, list(config['tables']))
+            if catalog_path:
+                add_to_catalog(Path(catalog_path), scenario, 'locust', locust, log_dirname, report_date, catalog_tables)
             # create_report(log_dirname.parent, log_datetime, locust.tables(list()), locust.charts(charts_names))
+
+        case 'artillery':
+            # artillery run --output report.json: report is written next to the JSON file
+            report_dirname = log_dirname.parent if log_dirname.is_file() else log_dirname
+            report_date = log_dirname.stem if log_dirname.is_file() else log_datetime
+            artillery = Artillery()
+            artillery.parse(log_dirname)
+            artillery.process(ignore_transactions=set(config['tr_ignore']), transaction_groups=transaction_groups)
+            if args.check:
+                passed = check(artillery, sla_rules, args.json, args.junit)
+            else:
+                create_report(report_dirname, report_date, artillery.tables(list(config['tables'])) | phase_tables(artillery, phase_list), artillery.charts(list(config['charts']), windows), **bundle)
+            if args.export:
+                export(artillery, report_dirname, report_date, args.export, list(config['tables']))
+            if catalog_path:
+                add_to_catalog(Path(catalog_path), scenario, 'artillery', artillery, log_dirname, report_date, catalog_tables)
+
+        case 'trend':
+            if args.check:
+                argparser.error('--check works with tsung, locust or artillery logs')
+            if not catalog_path:
+                argparser.error('trend report needs --catalog or [catalog] path in report.ini')
+            catalog = Catalog(catalog_path)
+            try:
+                tables, charts = catalog.trend_report(scenario, trend_list)
+            finally:
+                catalog.close()
+            create_report(log_dirname, f'trend_{scenario}', tables, charts, **bundle)
+
+        case 'serve':
+            if args.check:
+                argparser.error('--check works with tsung, locust or artillery logs')
+            settings = Settings(list(config['tables']), list(config['charts']), windows, set(config['tr_ignore']),
+                                transaction_groups, phase_list)
+            serve(log_dirname, settings, args.host, args.port, args.max_runs, args.max_mb, chart_js)
+
+    if not passed:
+        sys.exit(1)
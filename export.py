@@ -0,0 +1,106 @@
+"""
+Export processed series and summary tables for notebooks and dashboards.
+
+After Tsung.process / Locust.process:
+    * series  - report.columns(), one row per name and interval: category, name, timestamp, count, mean ...
+    * summary - report.summary(table_list) in long format: table_name, name, metric, value
+
+Formats:
+    * sqlite  - report_<date>.sqlite, tables `series` and `summary` with indexes by name and timestamp
+    * parquet - series_<date>.parquet, summary_<date>.parquet (needs pyarrow)
+    * arrow   - series_<date>.arrow, summary_<date>.arrow, Arrow IPC (feather v2) files (needs pyarrow)
+
+All formats are written column by column (executemany / pyarrow tables), not row by row.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+EXPORT_FORMATS = ('sqlite', 'parquet', 'arrow')
+
+SQLITE_TYPES = {int: 'INTEGER', float: 'REAL', str: 'TEXT'}
+
+
+def summary_columns(summary: dict[str, list[dict]]) -> dict[str, list]:
+    """Convert {table_name: [{'name': .., metric: value}]} into long columns table_name, name, metric, value."""
+    columns = {'table_name': [], 'name': [], 'metric': [], 'value': []}
+    for table_name, rows in summary.items():
+        for row in rows:
+            for metric, value in row.items():
+                if metric == 'name' or not isinstance(value, int | float):
+                    continue
+                columns['table_name'].append(table_name)
+                columns['name'].append(row['name'])
+                columns['metric'].append(metric)
+                columns['value'].append(float(value))
+    return columns
+
+
+def sqlite_type(values: list) -> str:
+    """SQLite column type by the first value which is not None."""
+    for value in values:
+        if value is not None:
+            return SQLITE_TYPES.get(type(value), '')
+    return ''
+
+
+def write_sqlite_table(connection: sqlite3.Connection, table: str, columns: dict[str, list], index: tuple[str, ...]):
+    """Create table and insert all columns with one executemany."""
+    definition = ', '.join(f'"{name}" {sqlite_type(values)}'.strip() for name, values in columns.items())
+    connection.execute(f'CREATE TABLE "{table}" ({definition})')
+    placeholders = ', '.join('?' * len(columns))
+    connection.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', zip(*columns.values()))
+    connection.execute(f'CREATE INDEX "{table}_{"_".join(index)}" ON "{table}" ({", ".join(index)})')
+
+
+def export_sqlite(filepath: Path, series: dict[str, list], summary: dict[str, list]):
+    """Write series and summary columns to new sqlite database."""
+    filepath.unlink(missing_ok=True)
+    connection = sqlite3.connect(filepath)
+    try:
+        with connection:
+            write_sqlite_table(connection, 'series', series, ('name', 'timestamp'))
+            write_sqlite_table(connection, 'summary', summary, ('table_name', 'name'))
+    finally:
+        connection.close()
+
+
+def export_arrow(filepaths: dict[str, Path], columns: dict[str, dict[str, list]], file_format: str):
+    """Write every {name: columns} to parquet or Arrow IPC file filepaths[name]."""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError(f'Export to {file_format} needs pyarrow: pip install pyarrow') from None
+
+    for name, table_columns in columns.items():
+        table = pyarrow.table(table_columns)
+        if file_format == 'parquet':
+            pyarrow.parquet.write_table(table, filepaths[name])
+        else:
+            pyarrow.feather.write_feather(table, filepaths[name])
+
+
+def export(report, dirpath: Path, report_date: str, formats: list[str], table_list: list[str]) -> list[Path]:
+    """Export processed report (Tsung, Locust) to dirpath in formats, return written files."""
+    columns = {
+        'series': report.columns(),
+        'summary': summary_columns(report.summary(table_list)),
+    }
+    written = []
+    for file_format in formats:
+        match file_format:
+            case 'sqlite':
+                filepath = dirpath / f'report_{report_date}.sqlite'
+                export_sqlite(filepath, columns['series'], columns['summary'])
+                written.append(filepath)
+            case 'parquet' | 'arrow':
+                filepaths = {name: dirpath / f'{name}_{report_date}.{file_format}' for name in columns}
+                export_arrow(filepaths, columns, file_format)
+                written.extend(filepaths.values())
+            case _:
+                raise ValueError(f'Unknown export format "{file_format}"')
+    for filepath in written:
+        print(f"... wrote {filepath.name}", file=sys.stderr)
+    return written
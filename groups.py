@@ -0,0 +1,91 @@
+"""
+Transaction groups: roll-up series of many transactions, so charts have a bounded number of lines.
+
+Rules at report.ini, section [tr_groups] (like [tr_ignore], applied after it):
+    [tr_groups]
+    # group = glob patterns or re:regex, a transaction is in the first matched group
+    callbacks = tr_cb_*
+    payments = tr_deposit tr_withdraw*
+    games = re:tr_game_.*
+
+Group series are count-weighted roll-ups of the members, built in one pass over rows:
+    count[group][row] = sum(count[member][row])
+    mean[group][row] = sum(count[member][row] * mean[member][row]) / count[group][row]
+Charts transactions_mean and transactions_rate show groups and transactions out of groups,
+at most MAX_CHART_SERIES lines: the smallest (by count) of the rest are rolled up to group OTHER_GROUP,
+and so are the smallest groups if [tr_groups] alone defines more groups than that.
+Chart groups_members draws one chart per group with its members (drill-down).
+"""
+import re
+from collections.abc import Callable, Iterable
+from fnmatch import fnmatchcase
+
+MAX_CHART_SERIES = 20
+OTHER_GROUP = 'other'
+REGEX_PREFIX = 're:'
+
+
+def parse_groups(section: dict[str, str | None]) -> dict[str, Callable[[str], bool]]:
+    """Convert [tr_groups] section {group: 'tr_cb_* re:tr_pay.*'} into {group: match(name)}."""
+    groups = {}
+    for group, text in section.items():
+        patterns = (text or '').split()
+        if not patterns:
+            raise ValueError(f'Wrong transaction group "{group}", expected "group = pattern [pattern ...]"')
+        regexes = [re.compile(pattern[len(REGEX_PREFIX):]) for pattern in patterns if pattern.startswith(REGEX_PREFIX)]
+        globs = [pattern for pattern in patterns if not pattern.startswith(REGEX_PREFIX)]
+        groups[group] = (lambda name, regexes=regexes, globs=globs:
+                         any(regex.fullmatch(name) for regex in regexes) or any(fnmatchcase(name, glob) for glob in globs))
+    return groups
+
+
+def group_names(names: Iterable[str], rules: dict[str, Callable[[str], bool]], totals: dict[str, int],
+                max_series: int = MAX_CHART_SERIES) -> tuple[dict[str, list[str]], list[str]]:
+    """({group: members}, names out of groups) with at most max_series groups and names together.
+
+    totals - {name: count} to keep the largest transactions and groups out of OTHER_GROUP.
+    """
+    groups = {}
+    single = []
+    for name in sorted(names):
+        group = next((group for group, match in rules.items() if match(name)), None)
+        if group is None:
+            single.append(name)
+        else:
+            groups.setdefault(group, []).append(name)
+    if len(groups) + len(single) > max_series:
+        single.sort(key=lambda name: -totals.get(name, 0))
+        keep = max(0, max_series - len(groups) - (OTHER_GROUP not in groups))
+        groups.setdefault(OTHER_GROUP, []).extend(single[keep:])
+        single = sorted(single[:keep])
+        if len(groups) > max_series:
+            # OTHER_GROUP is one of max_series, the smallest groups are merged into it
+            smallest = sorted((group for group in groups if group != OTHER_GROUP),
+                              key=lambda group: sum(totals.get(name, 0) for name in groups[group]))
+            for group in smallest[:len(groups) - max_series]:
+                groups[OTHER_GROUP].extend(groups.pop(group))
+        groups[OTHER_GROUP].sort()
+    return groups, single
+
+
+def roll_up(counts: list[list], means: list[list]) -> tuple[list, list]:
+    """Count and count-weighted mean series of a group by series of members, None - gap of all members."""
+    group_count = []
+    group_mean = []
+    for row_counts, row_means in zip(zip(*counts), zip(*means)):
+        total = 0
+        weighted = 0
+        present = False
+        for count, mean in zip(row_counts, row_means):
+            if count is not None:
+                present = True
+                if count:
+                    total += count
+                    weighted += count * mean
+        if present:
+            group_count.append(total)
+            group_mean.append(weighted / total if total else 0)
+        else:
+            group_count.append(None)
+            group_mean.append(None)
+    return group_count, group_mean
@@ -16,12 +16,19 @@ timestamp,user_count,type,name,rps,fail_rps,p50,p66,p75,p80,p90,p95,p98,p99,p999
 ]
 """
 import csv
+import glob
+import heapq
 from collections import namedtuple, defaultdict
+from itertools import groupby
 import json
 from collections.abc import Sequence
+from operator import itemgetter
 from pathlib import Path
 from typing import Collection
 
+from phases import DEFAULT_TOLERANCE, Phase, detect_phases
+from resample import DEFAULT_INTERVAL, WindowSpec, fit_window, parse_window_spec, window_factor, window_values
+from timeaxis import TimeAxis
 from utils import str_number, str_sec, number, str_bytes, str_bits_per_sec
 
 CHART_DURATION_TEMPLATE = {
@@ -51,17 +58,99 @@ charts = {
         'data': []
     },
 }
-# PERCENTILE_HEADERS = 'p50 p66 p75 p80 p90 p95 p98 p99 p999 p9999 p100'
-PERCENTILE_HEADERS = 'p50 p60 p70 p80 p90 p100'
+PERCENTILE_HEADERS = 'p50 p66 p75 p80 p90 p95 p98 p99 p999 p9999 p100'
 COLUMN_HEADERS = f'type name timestamp user_count rps fail_rps {PERCENTILE_HEADERS} total_count total_falure_count total_median_response_time total_avr_response_time total_min_response_time total_max_response_time total_avr_content_size'
 DATA_HEADERS = f'user_count rps fail_rps {PERCENTILE_HEADERS} total_count total_falure_count total_median_response_time total_avr_response_time total_min_response_time total_max_response_time total_avr_content_size'.split()
+# CSV header -> data header, columns are found by the header row, not by position
+CSV_HEADERS = dict(zip(
+    'User Count,Requests/s,Failures/s,50%,66%,75%,80%,90%,95%,98%,99%,99.9%,99.99%,100%,Total Request Count,Total Failure Count,Total Median Response Time,Total Average Response Time,Total Min Response Time,Total Max Response Time,Total Average Content Size'.split(','),
+    DATA_HEADERS))
+HISTORY_FILE_PATTERN = '*_stats_history.csv'
+
+# how values of the same timestamp and name from several files (workers) are merged
+SUM_HEADERS = 'user_count rps fail_rps total_count total_falure_count'.split()
+# weighted by requests of this second
+RPS_WEIGHTED_HEADERS = PERCENTILE_HEADERS.split()
+# weighted by requests since test start
+COUNT_WEIGHTED_HEADERS = 'total_median_response_time total_avr_response_time total_avr_content_size'.split()
 Data = namedtuple('Data', 'type name timestamp user_count rps fail_rps p50 p66 p75 p80 p90 p95 p98 p99 p999 p9999 p100 total_count total_falure_count total_median_response_time total_avr_response_time total_min_response_time total_max_response_time total_avr_content_size')
 ValueAtTime = namedtuple('ValueAtTime', 'timestamp value')
 
+def history_files(path: str | Path) -> list[Path]:
+    """History files by path: file, directory with *_stats_history.csv files or glob pattern."""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(path.glob(HISTORY_FILE_PATTERN))
+    if path.is_file():
+        return [path]
+    return sorted(Path(filename) for filename in glob.glob(str(path)))
+
+
+def read_history(filepath: Path) -> list[dict]:
+    """Records of one history file, sorted by timestamp."""
+    data = []
+    with open(filepath, 'r') as csvfile:
+        reader = csv.reader(csvfile, delimiter=',')
+        header = next(reader)
+        columns = {CSV_HEADERS[name]: i for i, name in enumerate(header) if name in CSV_HEADERS}
+
+        for row in reader:
+            if not row or "N/A" in row:
+                continue
+            d = {
+                'timestamp': int(row[0]),
+                'name': row[3],
+                'type': row[2]
+            }
+            for key, i in columns.items():
+                value = row[i]
+                d[key] = float(value) if '.' in value else int(value)
+            if d['user_count'] == '0' or d['name'] == 'Aggregated':
+                continue
+
+            data.append(d)
+    # locust writes rows in time order, so it is a linear check for one file
+    data.sort(key=itemgetter('timestamp'))
+    return data
+
+
+def weighted_mean(records: list[dict], header: str, weight_header: str) -> float | None:
+    """Mean of header values weighted by weight_header, plain mean if all weights are 0."""
+    pairs = [(record[header], record[weight_header]) for record in records if header in record]
+    if not pairs:
+        return None
+    total_weight = sum(weight for _, weight in pairs)
+    if not total_weight:
+        return sum(value for value, _ in pairs) / len(pairs)
+    return sum(value * weight for value, weight in pairs) / total_weight
+
+
+def merge_records(records: list[dict]) -> dict:
+    """Merge records of the same timestamp and name from several files (workers).
+
+    Rates and counts are summed, percentiles are weighted by requests of this second,
+    total mean values by requests since test start.
+    """
+    if len(records) == 1:
+        return records[0]
+    merged = {key: records[0][key] for key in ('timestamp', 'name', 'type')}
+    for header in SUM_HEADERS:
+        merged[header] = sum(record.get(header, 0) for record in records)
+    for header in RPS_WEIGHTED_HEADERS:
+        merged[header] = weighted_mean(records, header, 'rps')
+    for header in COUNT_WEIGHTED_HEADERS:
+        merged[header] = weighted_mean(records, header, 'total_count')
+    merged['total_min_response_time'] = min(record['total_min_response_time'] for record in records)
+    merged['total_max_response_time'] = max(record['total_max_response_time'] for record in records)
+    return merged
+
+
 class Locust:
 
     def __init__(self):
         self.start_timestamp: int = 0    # int(self.data[0]['timestamp']) - начало теста
+        self.interval: int = DEFAULT_INTERVAL    # sec between history rows, locust CSV_STATS_INTERVAL_SEC
+        self.axis = TimeAxis([])    # row position for every history timestamp, shared by all series
         # self.data = [
         #   {'timestamp': 1746441577, 'payments~currencies': Data(name='currencies', count='3', mean='0.35333333333333333', stddev_10sec='0.10977654070378101', max='0.481', min='0.213', mean='0', count='0'), 'tr_get_host_name': Data(name='tr_get_host_name', count_10sec='1', mean_10sec='0.211', stddev_10sec='0', max='0.211', min='0.211', mean='0', count='0'), 'tr_profile': Data(name='tr_profile', count_10sec='1', mean_10sec='92.286', stddev_10sec='0', max='92.286', min='92.286', mean='0', count='0'), 'tr_cb_balance': Data(name='tr_cb_balance', count_10sec='2', mean_10sec='78.20349999999999', stddev_10sec='0.6774999999999984', max='78.881', min='77.526', mean='0', count='0'), 'tr_deposit': Data(name='tr_deposit', count_10sec='2', mean_10sec='210.4145', stddev_10sec='94.92249999999999', max='305.337', min='115.492', mean='0', count='0'), 'tr_cb_bet': Data(name='tr_cb_bet', count_10sec='1', mean_10sec='128.603', stddev_10sec='0', max='128.603', min='128.603', mean='0', count='0'), 'tr_cb_liveness': Data(name='tr_cb_liveness', count_10sec='2', mean_10sec='57.5655', stddev_10sec='0.23550000000000182', max='57.801', min='57.33', mean='0', count='0'), 'tr_set_var': Data(name='tr_set_var', count_10sec='1', mean_10sec='1.319', stddev_10sec='0', max='1.319', min='1.319', mean='0', count='0'), 'tr_game_init_by_alias_100hp': Data(name='tr_game_init_by_alias_100hp', count_10sec='1', mean_10sec='516.781', stddev_10sec='0', max='516.781', min='516.781', mean='0', count='0'), 'tr_registration': Data(name='tr_registration', count_10sec='1', mean_10sec='853.515', stddev_10sec='0', max='853.515', min='853.515', mean='0', count='0'), 'tr_cb_win': Data(name='tr_cb_win', count_10sec='1', mean_10sec='120.871', stddev_10sec='0', max='120.871', min='120.871', mean='0', count='0')},
         #   {'timestamp': 1746441587, 'user~profile': Data(name='profile', count='17', mean='0.2787058823529412', stddev_10sec='0.08338201576858896', max='0.481', min='0.154', mean='0.35333333333333333', count='3'), 'tr_get_host_name': Data(name='tr_get_host_name', count_10sec='5', mean_10sec='0.09519999999999999', stddev_10sec='9.797958971132722e-4', max='0.211', min='0.094', mean='0.211', count='1'), 'tr_profile': Data(name='tr_profile', count_10sec='3', mean_10sec='68.70466666666668', stddev_10sec='1.733355192169859', max='92.286', min='67.252', mean='92.286', count='1'), 'tr_cb_balance': Data(name='tr_cb_balance', count_10sec='10', mean_10sec='219.93030000000005', stddev_10sec='423.06610577427494', max='1488.985', min='70.918', mean='78.20349999999999', count='2'), 'tr_deposit': Data(name='tr_deposit', count_10sec='10', mean_10sec='256.9764', stddev_10sec='177.17312444453867', max='742.261', min='115.492', mean='210.4145', count='2'), 'tr_cb_bet': Data(name='tr_cb_bet', count_10sec='11', mean_10sec='111.66672727272726', stddev_10sec='6.812481180503231', max='128.603', min='99.866', mean='128.603', count='1'), 'tr_cb_liveness': Data(name='tr_cb_liveness', count_10sec='11', mean_10sec='54.796', stddev_10sec='3.7567712442758854', max='60.75', min='50.013', mean='57.5655', count='2'), 'tr_set_var': Data(name='tr_set_var', count_10sec='5', mean_10sec='0.4328', stddev_10sec='0.025063120316512876', max='1.319', min='0.399', mean='1.319', count='1'), 'tr_game_init_by_alias_100hp': Data(name='tr_game_init_by_alias_100hp', count_10sec='2', mean_10sec='381.39', stddev_10sec='13.959999999999994', max='516.781', min='367.43', mean='516.781', count='1'), 'tr_registration': Data(name='tr_registration', count_10sec='5', mean_10sec='573.5674000000001', stddev_10sec='609.6595576200214', max='1792.548', min='253.876', mean='853.515', count='1'), 'tr_cb_win': Data(name='tr_cb_win', count_10sec='11', mean_10sec='117.02181818181818', stddev_10sec='6.741436531808092', max='129.156', min='104.488', mean='120.871', count='1')}
@@ -77,104 +166,143 @@ class Locust:
         return json.dumps(self.data)
 
 
-    def parse(self, filepath: str | Path):
-        """Parse full_history.cvs from dirpath."""
-        with open(filepath, 'r') as csvfile:
-            # print(next(csvfile))
-            reader = csv.reader(csvfile, delimiter=',')
-            print(next(reader))
-
-            for row in reader:
-                if not row or "N/A" in row:
-                    continue
-                # Users = 0
-                row_numbers = map(lambda x: float(x) if '.' in x else int(x), [row[1]] + row[4:])
-                #d = Data(row[2], row[3], *row_numbers)
-                d = {
-                    'timestamp': int(row[0]),
-                    'name': row[3],
-                    'type': row[2]
-                }
-                d.update(dict(zip(DATA_HEADERS, row_numbers)))
-                print(d)
-                if d['user_count'] == '0' or d['name'] == 'Aggregated':
-                    continue
-
-                # data = {'timestamp': d.timestamp, d.name: d}
-                self.data.append(d)
+    def parse(self, path: str | Path):
+        """Parse *_stats_history.csv files: one file, directory with files or glob pattern.
+
+        Files of one run (per worker, or per run segment) are read one by one and merged by timestamp.
+        """
+        filepaths = history_files(path)
+        if not filepaths:
+            raise FileNotFoundError(f'No locust {HISTORY_FILE_PATTERN} files at {path}')
+        histories = [read_history(filepath) for filepath in filepaths]
+        if len(histories) == 1:
+            self.data = histories[0]
+            return
+        # k-way merge of files sorted by timestamp, then merge records of the same name
+        for timestamp, records in groupby(heapq.merge(*histories, key=itemgetter('timestamp')), key=itemgetter('timestamp')):
+            by_name = defaultdict(list)
+            for record in records:
+                by_name[record['name']].append(record)
+            self.data.extend(merge_records(same_name) for same_name in by_name.values())
 
     @staticmethod
     def get_names(data: list[dict]):
         return set(record['name'] for record in data)
 
     def process(self, ignore_transactions: Collection[str] | None = None):
-        """Aggregate data by names for charts
+        """Aggregate data by names for charts, values are aligned with self.axis, None - no data (gap)
         self.xydata = {
             '/v1/users/login': {
-                'rps': [{'timestamp':1753970288, 'value':0.333333},],
-                'fail_rps': [{'timestamp':1753970288, 'value':0.1},],
+                'rps': [0.333333, 0.5, None, 0.4],
+                'fail_rps': [0.1, 0.0, None, 0.0],
             },
             'payments~currencies': {
-                'rps': [{'timestamp':1753970288, 'value':0.333333},],
-                'fail_rps': [{'timestamp':1753970288, 'value':0.1},],
+                'rps': [None, 0.333333, 0.2, 0.1],
+                'fail_rps': [None, 0.1, 0.0, 0.0],
             },
         }
         """
         self.endpoints = self.get_names(self.data)
-        print(self.endpoints)
+        self.start_timestamp = self.data[0]['timestamp']
+        self.axis = TimeAxis(data['timestamp'] for data in self.data)
+        self.interval = self.axis.interval
         self.xydata = {}
         for endpoint in self.endpoints:
-            self.xydata[endpoint] = {header: list() for header in DATA_HEADERS}
-            self.xydata[endpoint]['timestamp'] = 0 # dummy timestamp
-        self.start_timestamp = self.data[0]['timestamp']
+            self.xydata[endpoint] = {header: self.axis.series() for header in DATA_HEADERS}
         for data in self.data:
-            name = data['name']
-            timestamp = data['timestamp']
-            if not self.xydata[name]['timestamp']:
-                self.xydata[name]['timestamp'] = timestamp
+            row = self.axis.row(data['timestamp'])
             for header in DATA_HEADERS:
-                self.xydata[name][header].append(data[header])
-        print(self.xydata)
+                self.xydata[data['name']][header][row] = data.get(header)
+
+    def phases(self, tolerance: float = DEFAULT_TOLERANCE) -> list[Phase]:
+        """Ramp-up, plateau and ramp-down by user_count, see phases.py."""
+        users = self.axis.series()
+        for xydata in self.xydata.values():
+            for row, value in enumerate(xydata['user_count']):
+                if value is not None and (users[row] is None or value > users[row]):
+                    users[row] = value
+        return detect_phases(users, tolerance)
 
-    def tables(self, table_list: list[str]):
+    def summary(self, table_list: list[str], rows: slice = slice(None)) -> dict[str, list[dict]]:
         return {}
 
-    def one_chart_data(self, names: Collection[str], get_data_by_name) -> list[dict]:
-        """Build (x,y) data for all chart series by names and get_data_by_name function."""
+    def tables(self, table_list: list[str], rows: slice = slice(None)):
+        return {}
+
+    def columns(self) -> dict[str, list]:
+        """Processed series as columns, one row per endpoint and history timestamp with data (for export)."""
+        columns = {'name': [], 'timestamp': []} | {header: [] for header in DATA_HEADERS}
+        for name in sorted(self.endpoints):
+            xydata = self.xydata[name]
+            rows = [row for row, value in enumerate(xydata['rps']) if value is not None]
+            columns['name'].extend([name] * len(rows))
+            columns['timestamp'].extend(self.axis.timestamp(row) for row in rows)
+            for header in DATA_HEADERS:
+                columns[header].extend(xydata[header][row] for row in rows)
+        return columns
+
+    def one_chart_data(self, names: Collection[str], get_data_by_name, window: WindowSpec | None = None,
+                       weights_header: str | None = None, rows: slice = slice(None)) -> list[dict]:
+        """Build y data for all chart series by names and get_data_by_name function.
+
+        window - resample and rolling spec, parsed from report.ini [resample] section ('1min', '30s max 5min').
+        weights_header - weight values by this header (rps for percentiles) while resampling.
+        rows - slice of self.axis rows (zoom), all rows by default.
+        x values are the same for all series, see self.labels(window).
+        """
         lines_data = []
         for name in sorted(names):
             data = get_data_by_name(name)
-            y = data
-            ylen = len(y)
-            x0 = self.xydata[name]['timestamp'] - self.start_timestamp
-            points = [{'x': x, 'y': y} for x, y in zip(range(x0, x0 + ylen * 10, 10), y)]
+            weights = self.xydata[name][weights_header][rows] if weights_header else None
+            values = window_values(data[rows], self.interval, window, weights)
 
             line_data = {
                 "label": name,
                 "fill": False,
                 "tension": 0,
-                "data": points
+                "data": values
             }
             lines_data.append(line_data)
 
         return lines_data
 
-    def charts(self, chart_list: list[str]):
-        """Fill charts dictionary after parsing and return it."""
-        charts_data = {key: value for key, value in charts.items() if key in chart_list}
+    def labels(self, window: WindowSpec | None = None, rows: slice = slice(None)) -> list[int]:
+        """x values (sec of running test) shared by all series of a chart with this window."""
+        return self.axis.labels(window_factor(self.interval, window), rows)
+
+    def chart_rows(self, time_range: tuple[int | None, int | None] | None = None) -> slice:
+        """Rows of charts for time_range (begin, end) in sec of running test, all rows by default."""
+        if time_range is None:
+            return slice(None)
+        return self.axis.slice(*time_range)
+
+    def charts(self, chart_list: list[str], windows: dict[str, str] | None = None,
+               time_range: tuple[int | None, int | None] | None = None, max_points: int | None = None):
+        """Fill charts dictionary after parsing and return it.
+
+        windows - {chart_name: window spec} from report.ini [resample] section.
+        time_range - (begin, end) sec of running test, zoom of all charts.
+        max_points - resample to wider window if there are more points in time_range (see server.py).
+        """
+        windows = windows or {}
+        charts_data = {key: dict(value) for key, value in charts.items() if key in chart_list}
+        rows = self.chart_rows(time_range)
+        length = len(range(*rows.indices(len(self.axis))))
 
         for chart_name in chart_list:
             lines_data = None
+            window = fit_window(parse_window_spec(windows.get(chart_name)), self.interval, length, max_points)
             match chart_name:
                 case 'transactions_p50':
                     # Mean transaction duration
-                    lines_data = self.one_chart_data(self.endpoints, lambda name: self.xydata[name]['p50'])
+                    lines_data = self.one_chart_data(self.endpoints, lambda name: self.xydata[name]['p50'], window, 'rps', rows)
 
                 case  'transactions_rate':
-                    lines_data = self.one_chart_data(self.endpoints, lambda name: self.xydata[name]['rps'])
+                    lines_data = self.one_chart_data(self.endpoints, lambda name: self.xydata[name]['rps'], window, rows=rows)
 
             charts_data[chart_name]['data'] = lines_data
             charts_data[chart_name]['json'] = json.dumps(lines_data)
+            charts_data[chart_name]['labels'] = json.dumps(self.labels(window, rows))
 
         return charts_data
 
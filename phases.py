@@ -0,0 +1,73 @@
+"""
+Test phases: ramp-up, plateau and ramp-down, detected from the number of simultaneous users.
+
+Users series (tsung `users` or `connected`, locust `user_count`) is aligned with the run time axis.
+Plateau is every row from the first to the last one with users >= (1 - tolerance) * peak users:
+
+    users   1 3 6 9 10 10 9 10 10 4 1
+    phase   ramp-up  |   plateau    | ramp-down
+
+Tables of report.ini [phases] section are built for every phase (Tsung.summary(table_list, rows)),
+sums over a phase are differences of prefix sums (PrefixSums), computed once for every series,
+so a table of one more phase costs O(1) per name for sums and a slice of the phase for max / min.
+"""
+from collections import namedtuple
+from itertools import accumulate
+
+DEFAULT_TOLERANCE = 0.05
+
+# rows of the time axis: slice(begin, end)
+Phase = namedtuple('Phase', 'name title rows')
+
+
+def detect_phases(users: list, tolerance: float = DEFAULT_TOLERANCE) -> list[Phase]:
+    """Phases of the run by users series, None in users is a gap. Empty phases are omitted."""
+    peak = max((value for value in users if value is not None), default=0)
+    if peak <= 0:
+        return []
+    threshold = peak * (1 - tolerance)
+    first = last = None
+    for row, value in enumerate(users):
+        if value is not None and value >= threshold:
+            if first is None:
+                first = row
+            last = row
+    phases = [
+        Phase('ramp_up', 'ramp-up', slice(0, first)),
+        Phase('plateau', 'plateau', slice(first, last + 1)),
+        Phase('ramp_down', 'ramp-down', slice(last + 1, len(users))),
+    ]
+    return [phase for phase in phases if phase.rows.stop > phase.rows.start]
+
+
+class PrefixSums:
+    """Cumulative sum and number of values of a series with gaps, sums of any rows in O(1)."""
+
+    def __init__(self, values: list):
+        self.sums = list(accumulate((value or 0 for value in values), initial=0))
+        self.counts = list(accumulate((value is not None for value in values), initial=0))
+
+    def bounds(self, rows: slice) -> tuple[int, int]:
+        begin, end, _ = rows.indices(len(self.sums) - 1)
+        return begin, max(begin, end)
+
+    def sum(self, rows: slice = slice(None)) -> int | float:
+        """Sum of values of rows, gaps are 0."""
+        begin, end = self.bounds(rows)
+        return self.sums[end] - self.sums[begin]
+
+    def count(self, rows: slice = slice(None)) -> int:
+        """Number of values (not gaps) in rows."""
+        begin, end = self.bounds(rows)
+        return self.counts[end] - self.counts[begin]
+
+
+def phase_tables(report, table_list: list[str], tolerance: float = DEFAULT_TOLERANCE) -> dict:
+    """Tables of table_list for every phase of processed report (Tsung, Locust), keyed as 'transaction_plateau'."""
+    tables = {}
+    for phase in report.phases(tolerance):
+        x = report.axis.x[phase.rows]
+        for table_name, table in report.tables(table_list, phase.rows).items():
+            table['title'] = f'{table["title"]}, {phase.title} {x[0]}-{x[-1]} sec'
+            tables[f'{table_name}_{phase.name}'] = table
+    return tables
@@ -0,0 +1,234 @@
+"""
+Resample chart series to wider time windows and smooth them with rolling statistics.
+
+Tsung dumps statistics every 10 sec by default (``dumpstats_interval`` may change it),
+locust writes history every second. The dump interval is detected from timestamps,
+then every series can be re-aggregated to 30 sec / 1 min / 5 min windows.
+
+Window is selected per chart at report.ini, section [resample]:
+    [resample]
+    # chart_name = window [rolling_function rolling_window]
+    transactions_mean = 1min
+    transactions_rate = 30s max 5min
+    cpu = 10s p95 2min
+
+Rolling functions: mean, max, pNN (percentile, p50, p95, p99 etc).
+Window must be a multiple of the dump interval, rolling window - a multiple of window and larger than it,
+otherwise ValueError: values are never silently truncated to a shorter window.
+Rolling mean and max are O(n), rolling percentile is O(n * w) for n values and window of w values (see rolling_percentile).
+
+Means are count-weighted: mean of a window is sum(count * mean) / sum(count).
+None in values is a gap (no data for this interval), gaps are skipped.
+"""
+import math
+from bisect import bisect_left, insort
+from collections import Counter, deque, namedtuple
+
+DEFAULT_INTERVAL = 10
+DURATION_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600}
+
+WindowSpec = namedtuple('WindowSpec', 'window function rolling_window')
+
+
+def parse_duration(text: str) -> int:
+    """Convert '30s', '1min', '5min', '1h' or '90' into seconds."""
+    text = text.strip().lower()
+    digits = text.rstrip('abcdefghijklmnopqrstuvwxyz')
+    unit = text[len(digits):] or 's'
+    if not digits or unit not in DURATION_UNITS:
+        raise ValueError(f'Unknown duration "{text}"')
+    return int(digits) * DURATION_UNITS[unit]
+
+
+def parse_window_spec(text: str | None) -> WindowSpec | None:
+    """Parse '1min' or '30s max 5min' into WindowSpec, None or empty text means no resampling."""
+    if not text:
+        return None
+    words = text.split()
+    if len(words) == 1:
+        return WindowSpec(parse_duration(words[0]), None, 0)
+    if len(words) == 3:
+        function = words[1].lower()
+        if function not in ('mean', 'max') and not (function.startswith('p') and function[1:].replace('.', '', 1).isdigit()):
+            raise ValueError(f'Unknown rolling function "{words[1]}"')
+        window, rolling_window = parse_duration(words[0]), parse_duration(words[2])
+        if rolling_window <= window or rolling_window % window:
+            raise ValueError(f'Wrong window "{text}": rolling window must be a multiple of window and larger than it')
+        return WindowSpec(window, function, rolling_window)
+    raise ValueError(f'Wrong window "{text}", expected "window [function rolling_window]"')
+
+
+def detect_interval(timestamps) -> int:
+    """The most common step between sorted timestamps such that every step is a whole number of it,
+    DEFAULT_INTERVAL if it can not be detected.
+
+    A step may differ from a whole number of intervals by a quarter of interval (dump drift, 11 sec
+    instead of 10), so a skipped block (steps 20, 10) gives interval 10, not 20, and a second of drift
+    does not make it 1. Equally common steps: the smaller one. If no step fits, the most common one.
+    """
+    timestamps = sorted(set(timestamps))
+    steps = Counter(b - a for a, b in zip(timestamps, timestamps[1:]))
+    if not steps:
+        return DEFAULT_INTERVAL
+    candidates = sorted(steps, key=lambda step: (-steps[step], step))
+    for interval in candidates:
+        if all(abs(step - max(1, round(step / interval)) * interval) * 4 <= interval for step in steps):
+            return interval
+    return candidates[0]
+
+
+def resample(values: list, factor: int, weights: list | None = None) -> list:
+    """Aggregate every factor values into one (weighted) mean.
+
+    Values are aligned with the run time axis, so windows of all series start at the test start.
+    Rate of a window is the plain mean of rates, mean duration is weighted by counts.
+    """
+    if factor <= 1:
+        return list(values)
+    result = []
+    n = len(values)
+    for start in range(0, n, factor):
+        total = weight_total = 0
+        plain_total = plain_count = 0
+        for i in range(start, min(start + factor, n)):
+            value = values[i]
+            if value is None:
+                continue
+            plain_total += value
+            plain_count += 1
+            if weights is not None:
+                total += value * weights[i]
+                weight_total += weights[i]
+        if weight_total:
+            result.append(total / weight_total)
+        elif plain_count:
+            result.append(plain_total / plain_count)
+        else:
+            result.append(None)
+    return result
+
+
+def resample_sum(values: list, factor: int) -> list:
+    """Sum every factor values into one (counts of a window, weights of resampled means)."""
+    if factor <= 1:
+        return list(values)
+    result = []
+    for start in range(0, len(values), factor):
+        window = [value for value in values[start:start + factor] if value is not None]
+        result.append(sum(window) if window else None)
+    return result
+
+
+def rolling_mean(values: list, size: int, weights: list | None = None) -> list:
+    """(Weighted) mean over the last size values, O(n) with running sums."""
+    result = []
+    total = weight_total = 0
+    for i, value in enumerate(values):
+        if value is not None:
+            weight = 1 if weights is None else weights[i]
+            total += value * weight
+            weight_total += weight
+        if i >= size:
+            old = values[i - size]
+            if old is not None:
+                weight = 1 if weights is None else weights[i - size]
+                total -= old * weight
+                weight_total -= weight
+        result.append(total / weight_total if weight_total else None)
+    return result
+
+
+def rolling_max(values: list, size: int) -> list:
+    """Max over the last size values, O(n) with monotonic deque of indexes."""
+    result = []
+    window = deque()
+    for i, value in enumerate(values):
+        if value is not None:
+            while window and values[window[-1]] <= value:
+                window.pop()
+            window.append(i)
+        if window and window[0] <= i - size:
+            window.popleft()
+        result.append(values[window[0]] if window else None)
+    return result
+
+
+def rolling_percentile(values: list, size: int, percent: float) -> list:
+    """Percentile (nearest rank) over the last size values, window is kept sorted with bisect.
+
+    O(n log size) comparisons, but insort and del move up to size items each: O(n * size) in the worst case.
+    Moves are one memmove in C, for 200k values it is faster than two heaps with lazy deletion
+    (O(n log size)) up to windows of ~10000 values.
+    """
+    result = []
+    window = []
+    for i, value in enumerate(values):
+        if value is not None:
+            insort(window, value)
+        if i >= size and values[i - size] is not None:
+            del window[bisect_left(window, values[i - size])]
+        if window:
+            rank = max(0, min(len(window), math.ceil(percent / 100 * len(window))) - 1)
+            result.append(window[rank])
+        else:
+            result.append(None)
+    return result
+
+
+def rolling(values: list, size: int, function: str, weights: list | None = None) -> list:
+    """Apply rolling function ('mean', 'max', 'p95', ...) with window of size values."""
+    if size <= 1:
+        return list(values)
+    if function == 'mean':
+        return rolling_mean(values, size, weights)
+    if function == 'max':
+        return rolling_max(values, size)
+    return rolling_percentile(values, size, float(function[1:]))
+
+
+def window_factor(interval: int, spec: WindowSpec | None = None) -> int:
+    """Number of interval rows in one resample window, ValueError if window is not a multiple of interval."""
+    if spec is None:
+        return 1
+    if spec.window % interval:
+        raise ValueError(f'Window {spec.window} sec is not a multiple of the dump interval {interval} sec')
+    return max(1, spec.window // interval)
+
+
+def fit_window(spec: WindowSpec | None, interval: int, length: int, max_points: int | None = None) -> WindowSpec | None:
+    """Widen window of spec so length rows are resampled to at most max_points values (chart zoom).
+
+    Rolling window is rounded up to a multiple of the wider window, rolling statistics are dropped
+    if the wider window is already as long as the rolling window.
+    """
+    if not max_points or length <= max_points:
+        return spec
+    window = -(-length // max_points) * interval
+    if spec is None:
+        return WindowSpec(window, None, 0)
+    if spec.window >= window:
+        return spec
+    if spec.function is None or spec.rolling_window <= window:
+        return WindowSpec(window, None, 0)
+    return WindowSpec(window, spec.function, -(-spec.rolling_window // window) * window)
+
+
+def window_values(values: list, interval: int, spec: WindowSpec | None = None,
+                  weights: list | None = None) -> list:
+    """Resample and smooth series values (one value per interval) by window spec.
+
+    Weights (counts) of a window are summed, so the rolling mean is weighted by counts of whole windows
+    (python -m doctest resample.py):
+    >>> round(window_values([100, 100, 200, None], 10, WindowSpec(20, 'mean', 40), [10, 10, 10, None])[-1], 1)
+    133.3
+    """
+    if spec is None:
+        return values
+    factor = window_factor(interval, spec)
+    if factor > 1:
+        values = resample(values, factor, weights)
+        if weights is not None:
+            weights = resample_sum(weights, factor)
+    if spec.function:
+        values = rolling(values, spec.rolling_window // (interval * factor), spec.function, weights)
+    return values
@@ -0,0 +1,229 @@
+"""
+Local report server: browse reports of all runs under a directory without writing HTML files.
+
+python create_report.py serve logs --port 8000
+
+Runs are found by data files: tsung.log (tsung), report.json (artillery), *_stats_history.csv (locust).
+Parsed and processed runs (Tsung, Artillery, Locust objects) are kept in LRU cache, bounded by
+number of runs and by total size of their log files, so switching between recent runs does not
+re-parse logs. Changed log file (other mtime) is parsed again.
+
+    /                                       - list of runs
+    /report?run=<run>                       - tables and charts of the run
+    /api/charts?run=<run>&chart=<chart_name>&begin=<sec>&end=<sec>&points=<max points>
+                                            - chart data as JSON: title, xheader, yheader, labels, datasets
+
+Zoom: begin, end - sec of running test. Series of the range are resampled on the server
+to the window with at most `points` values (see resample.fit_window), so a zoom into a few minutes
+of a 24h run shows the original 10 sec values and the whole run is still a few hundred points.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from artillery_data import Artillery
+from locust_data import Locust
+from phases import phase_tables
+from tsung_data import Tsung
+
+DEFAULT_MAX_RUNS = 8
+DEFAULT_MAX_MB = 512
+DEFAULT_MAX_POINTS = 500
+LOCUST_CHARTS = ['transactions_rate', 'transactions_p50']
+LOCUST_DATA_SUFFIX = '_stats_history.csv'
+
+# report.ini values used by server
+Settings = namedtuple('Settings', 'tables charts windows ignore_transactions transaction_groups phases')
+Run = namedtuple('Run', 'framework path')
+
+
+def run_framework(filename: str) -> str | None:
+    """Framework by name of log file, None if it is not a log file."""
+    if filename == Tsung.DATA_FILE_NAME:
+        return 'tsung'
+    if filename == Artillery.DATA_FILE_NAME:
+        return 'artillery'
+    if filename.endswith(LOCUST_DATA_SUFFIX):
+        return 'locust'
+    return None
+
+
+def find_runs(root: Path) -> dict[str, Run]:
+    """{run name (path relative to root): Run} for all log files under root."""
+    runs = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            framework = run_framework(filename)
+            if framework:
+                path = Path(dirpath) / filename
+                runs[path.relative_to(root).as_posix()] = Run(framework, path)
+    return dict(sorted(runs.items()))
+
+
+def load_run(run: Run, settings: Settings) -> Tsung | Locust:
+    """Parse and process log of the run."""
+    match run.framework:
+        case 'tsung':
+            report = Tsung()
+            report.parse(run.path.parent)
+        case 'artillery':
+            report = Artillery()
+            report.parse(run.path)
+        case 'locust':
+            report = Locust()
+            report.parse(run.path)
+            report.process()
+            return report
+        case _:
+            raise ValueError(f'Unknown framework "{run.framework}"')
+    report.process(ignore_transactions=settings.ignore_transactions, transaction_groups=settings.transaction_groups)
+    return report
+
+
+class RunCache:
+    """LRU cache of processed runs, bounded by number of runs and total size of log files."""
+
+    def __init__(self, settings: Settings, max_runs: int = DEFAULT_MAX_RUNS, max_bytes: int = DEFAULT_MAX_MB << 20):
+        self.settings = settings
+        self.max_runs = max_runs
+        self.max_bytes = max_bytes
+        # path -> (mtime, size, report), the most recently used is the last
+        self.reports: OrderedDict[Path, tuple[float, int, Tsung | Locust]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, run: Run) -> Tsung | Locust:
+        """Processed report of the run, parse log only if it is not cached or changed."""
+        stat = run.path.stat()
+        with self.lock:
+            cached = self.reports.get(run.path)
+            if cached and cached[0] == stat.st_mtime:
+                self.reports.move_to_end(run.path)
+                return cached[2]
+        # parse without lock, other runs are served meanwhile
+        report = load_run(run, self.settings)
+        with self.lock:
+            self.reports[run.path] = (stat.st_mtime, stat.st_size, report)
+            self.reports.move_to_end(run.path)
+            self.evict()
+        return report
+
+    def evict(self):
+        """Drop the least recently used runs over the limits, the last used run is always kept."""
+        total = sum(size for _, size, _ in self.reports.values())
+        while len(self.reports) > 1 and (len(self.reports) > self.max_runs or total > self.max_bytes):
+            _, (_, size, _) = self.reports.popitem(last=False)
+            total -= size
+
+
+def chart_list(run: Run, settings: Settings) -> list[str]:
+    return LOCUST_CHARTS if run.framework == 'locust' else settings.charts
+
+
+def int_param(params: dict[str, list[str]], name: str) -> int | None:
+    """Integer query parameter, None if it is absent or empty."""
+    value = params.get(name, [''])[0]
+    return int(value) if value else None
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    # set by serve()
+    root: Path
+    cache: RunCache
+    environment = None
+    # vendored Chart.js (create_report.py --offline) is served as /chart.js, CDN otherwise
+    chart_js: bytes | None = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            match url.path:
+                case '/':
+                    self.send_html(self.render('server_index.html', runs=find_runs(self.root)))
+                case '/report':
+                    self.send_report(params)
+                case '/api/charts':
+                    self.send_chart(params)
+                case '/chart.js' if self.chart_js:
+                    self.send_content(self.chart_js, 'text/javascript')
+                case _:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+        except (KeyError, ValueError) as error:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(error))
+
+    def run(self, params: dict[str, list[str]]) -> Run:
+        """Run by name (path relative to root), only log files under root are served."""
+        name = params['run'][0]
+        path = (self.root / name).resolve()
+        framework = run_framework(path.name)
+        if not framework or not path.is_relative_to(self.root) or not path.is_file():
+            raise ValueError(f'Unknown run "{name}"')
+        return Run(framework, path)
+
+    def send_report(self, params: dict[str, list[str]]):
+        run = self.run(params)
+        report = self.cache.get(run)
+        settings = self.cache.settings
+        charts = report.charts(chart_list(run, settings), settings.windows, max_points=DEFAULT_MAX_POINTS)
+        chart_urls = {chart_name: '/api/charts?' + urlencode({'run': params['run'][0], 'chart': chart_name})
+                      for chart_name in charts}
+        self.send_html(self.render('server.html', title=params['run'][0],
+                                   tables=report.tables(settings.tables) | phase_tables(report, settings.phases),
+                                   charts=charts, chart_urls=chart_urls,
+                                   chart_js_url='/chart.js' if self.chart_js else None))
+
+    def send_chart(self, params: dict[str, list[str]]):
+        run = self.run(params)
+        chart_name = params['chart'][0]
+        charts = chart_list(run, self.cache.settings)
+        # drill-down charts groups_members_<group>_<index>, see Tsung.group_chart_names
+        if chart_name not in charts and not ('groups_members' in charts and chart_name.startswith('groups_members_')):
+            raise ValueError(f'Unknown chart "{chart_name}"')
+        report = self.cache.get(run)
+        time_range = (int_param(params, 'begin'), int_param(params, 'end'))
+        chart = report.charts([chart_name], self.cache.settings.windows, time_range,
+                              int_param(params, 'points') or DEFAULT_MAX_POINTS)[chart_name]
+        content = json.dumps({
+            'title': chart['title'],
+            'xheader': chart['xheader'],
+            'yheader': chart['yheader'],
+            'labels': json.loads(chart['labels']),
+            'datasets': chart['data'],
+        })
+        self.send_content(content.encode('utf-8'), 'application/json')
+
+    def render(self, template_name: str, **context) -> str:
+        return self.environment.get_template(template_name).render(**context)
+
+    def send_html(self, content: str):
+        self.send_content(content.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def send_content(self, content: bytes, content_type: str):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def serve(root: Path, settings: Settings, host: str = '127.0.0.1', port: int = 8000,
+          max_runs: int = DEFAULT_MAX_RUNS, max_mb: int = DEFAULT_MAX_MB, chart_js: str | None = None):
+    """Serve reports of all runs under root until Ctrl+C, chart_js - vendored library instead of CDN."""
+    from jinja2 import Environment, FileSystemLoader
+
+    ReportHandler.root = root.resolve()
+    ReportHandler.cache = RunCache(settings, max_runs, max_mb << 20)
+    ReportHandler.chart_js = chart_js.encode('utf-8') if chart_js else None
+    ReportHandler.environment = Environment(loader=FileSystemLoader(Path(__file__).parent / 'templates'),
+                                            autoescape=True)
+    with ThreadingHTTPServer((host, port), ReportHandler) as server:
+        print(f'... serving {root} at http://{host}:{server.server_port}/')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,103 @@
+"""
+SLA thresholds for CI: check summary of processed report without charts and HTML.
+
+Rules at report.ini, section [sla]:
+    [sla]
+    # table_name.metric[.name] = max|min value, name may be a glob pattern, default all names of the table
+    transaction.highest_mean = max 500
+    transaction.highest_mean.tr_cb_login = max 300
+    error.highest_rate = max 0.1
+    http.mean_rate.200 = min 5
+
+Values are the same as in summary (Tsung.summary): durations in msec, rates per sec.
+Rule with exact name (no * ? [) fails if there is no data for the name,
+any rule fails if its table is not in the summary (locust has no summary tables yet),
+so a check never passes with nothing checked.
+A table of events (error, http, match) is empty if there were no such events: max rules of it pass
+with value null (no data), e.g. error.highest_rate = max 0.1 on a run without errors,
+other rules of an empty table fail.
+
+Results are printed as JSON and optionally written as JUnit XML, one testcase per rule and name.
+"""
+import json
+import sys
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+OPERATORS = {
+    'max': lambda value, limit: value <= limit,
+    'min': lambda value, limit: value >= limit,
+}
+
+Rule = namedtuple('Rule', 'key table_name metric pattern operator limit')
+
+# tables of event counts, no rows means no events (every rate and total is 0)
+EVENT_TABLES = {'error', 'http', 'match'}
+
+
+def parse_rules(section: dict[str, str]) -> list[Rule]:
+    """Convert [sla] section {key: 'max 500'} into rules."""
+    rules = []
+    for key, text in section.items():
+        parts = key.split('.', 2)
+        words = (text or '').split()
+        if len(parts) < 2 or len(words) != 2 or words[0] not in OPERATORS:
+            raise ValueError(f'Wrong SLA rule "{key} = {text}", expected "table_name.metric[.name] = max|min value"')
+        pattern = parts[2] if len(parts) == 3 else '*'
+        rules.append(Rule(key, parts[0], parts[1], pattern, words[0], float(words[1])))
+    return rules
+
+
+def is_pattern(pattern: str) -> bool:
+    return any(char in pattern for char in '*?[')
+
+
+def evaluate(rules: list[Rule], summary: dict[str, list[dict]]) -> list[dict]:
+    """Check every rule for every matched name of the summary table."""
+    results = []
+    for rule in rules:
+        limit = f'{rule.operator} {rule.limit:g}'
+        table_rows = summary.get(rule.table_name)
+        rows = [row for row in table_rows or [] if fnmatchcase(row['name'], rule.pattern)]
+        for row in rows:
+            value = row.get(rule.metric)
+            passed = value is not None and OPERATORS[rule.operator](value, rule.limit)
+            results.append({'rule': rule.key, 'name': row['name'], 'limit': limit, 'value': value, 'passed': passed})
+        if rows or table_rows and is_pattern(rule.pattern):
+            continue
+        # no events at all: nothing exceeds a max limit
+        passed = (table_rows == [] and is_pattern(rule.pattern)
+                  and rule.table_name in EVENT_TABLES and rule.operator == 'max')
+        results.append({'rule': rule.key, 'name': rule.pattern, 'limit': limit, 'value': None, 'passed': passed})
+    return results
+
+
+def write_junit(results: list[dict], filepath: Path):
+    """JUnit XML, testcase classname is rule, name is table row name."""
+    failures = [result for result in results if not result['passed']]
+    suite = ET.Element('testsuite', name='sla', tests=str(len(results)), failures=str(len(failures)))
+    for result in results:
+        case = ET.SubElement(suite, 'testcase', classname=result['rule'], name=result['name'])
+        if not result['passed']:
+            value = 'no data' if result['value'] is None else f'{result["value"]:g}'
+            ET.SubElement(case, 'failure', message=f'{value}, expected {result["limit"]}')
+    ET.ElementTree(suite).write(filepath, encoding='utf-8', xml_declaration=True)
+    print(f"... wrote {filepath.name}", file=sys.stderr)
+
+
+def check(report, rules: list[Rule], json_path: Path | None = None, junit_path: Path | None = None) -> bool:
+    """Evaluate rules on processed report (Tsung, Locust), write results, return True if all rules passed."""
+    table_list = list(dict.fromkeys(rule.table_name for rule in rules))
+    results = evaluate(rules, report.summary(table_list))
+    passed = all(result['passed'] for result in results)
+    content = json.dumps({'passed': passed, 'checks': results}, indent=2)
+    if json_path:
+        json_path.write_text(content, encoding='utf-8')
+        print(f"... wrote {json_path.name}", file=sys.stderr)
+    else:
+        print(content)
+    if junit_path:
+        write_junit(results, junit_path)
+    return passed
@@ -0,0 +1,84 @@
+"""
+Run-wide time axis shared by all series of one test run.
+
+Every dump block (tsung) or history row (locust) timestamp is mapped to a row position:
+    row = round((timestamp - start) / interval)
+i.e. a timestamp is snapped to the nearest row within interval / 2 (a half rounds up), so a second
+of dump drift does not move values. interval is the most common step between timestamps
+(resample.detect_interval), a skipped block is a gap of one or more rows.
+Two timestamps never share a row: a timestamp snapped to the row of the previous one
+(or before it) takes the next row, the values of both are kept.
+A series is a list with one value per row, None for intervals without data, so
+a name missed for a few dumps (or a dump block skipped by tsung) is an explicit gap
+and all series are aligned by row without any search.
+
+axis = TimeAxis([1746469501, 1746469511, 1746469531])
+axis.x == [0, 10, 20, 30]                  # sec of running test, shared by all series
+axis.row(1746469531) == 3
+series = axis.series()                     # [None, None, None, None]
+series[axis.row(1746469511)] = 5           # [None, 5, None, None]
+"""
+from collections.abc import Iterable
+
+from resample import detect_interval
+
+
+class TimeAxis:
+
+    def __init__(self, timestamps: Iterable[int], interval: int | None = None):
+        timestamps = sorted(set(timestamps))
+        self.start: int = timestamps[0] if timestamps else 0
+        self.interval: int = interval or detect_interval(timestamps)
+        # timestamp -> row, O(1) alignment for every known timestamp
+        self.rows = {}
+        previous = -1
+        for timestamp in timestamps:
+            previous = self.rows[timestamp] = max(self.snap(timestamp), previous + 1)
+        length = max(self.rows.values()) + 1 if self.rows else 0
+        # x values (sec of running test) shared by all series
+        self.x: list[int] = [row * self.interval for row in range(length)]
+
+    def __len__(self):
+        return len(self.x)
+
+    def row(self, timestamp: int) -> int:
+        """Row position of the timestamp."""
+        row = self.rows.get(timestamp)
+        if row is None:
+            row = self.snap(timestamp)
+        return row
+
+    def snap(self, timestamp: int) -> int:
+        """Nearest row of the timestamp, a half rounds up."""
+        return (2 * (timestamp - self.start) + self.interval) // (2 * self.interval)
+
+    def timestamp(self, row: int) -> int:
+        """Timestamp of the row."""
+        return self.start + row * self.interval
+
+    def series(self) -> list:
+        """Empty series aligned with this axis, all rows are gaps."""
+        return [None] * len(self.x)
+
+    def slice(self, begin_sec: int | None = None, end_sec: int | None = None) -> slice:
+        """Rows between begin_sec and end_sec (sec of running test), the same slice for every series."""
+        begin = None if begin_sec is None else max(0, -(-begin_sec // self.interval))
+        end = None if end_sec is None else max(0, end_sec // self.interval + 1)
+        return slice(begin, end)
+
+    def labels(self, factor: int = 1, rows: slice = slice(None)) -> list[int]:
+        """x values of rows (all by default) resampled by factor rows in one window."""
+        return self.x[rows][::factor]
+
+
+def present(values: Iterable) -> list:
+    """Values without gaps."""
+    return [value for value in values if value is not None]
+
+
+def first_row(values: list) -> int | None:
+    """Row of the first value which is not a gap."""
+    for row, value in enumerate(values):
+        if value is not None:
+            return row
+    return None
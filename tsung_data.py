@@ -25,27 +25,27 @@ stats: tr_game_init_by_alias_100hp 1 516.781 0 516.781 516.781 0 0
 stats: tr_registration 1 853.515 0 853.515 853.515 0 0
 stats: tr_cb_win 1 120.871 0 120.871 120.871 0 0
 
-Counter data convert to CountData
+Counter data convert to CounterRecords
 name count_10sec count_total
-Other data (transactions, system cpu/memory etc) have format
+Other data (transactions, system cpu/memory etc) convert to DataRecords
 name count_10sec mean_10sec stddev_10sec max min mean count
-self.data = [
-  {
-    'timestamp': 1746469501,
-    "tr_registration": Data("tr_registration", "1", "853.515", "0", "853.515", "853.515", "0", "0"),
-    "match": CountData("match", "3", "15"),
-  }
-]
+Numbers are parsed once into typed arrays, one records object per (interned) name for all blocks:
+self.timestamps = array('q', [1746469501, 1746469511, ...])    # block -> timestamp
+self.records = [DataRecords('tr_registration'), CounterRecords('match'), ...]    # name id -> records
+self.name_ids = {'tr_registration': 0, 'match': 1, ...}
+self.records[1].blocks      == array('l', [0, 1, 3])            # blocks with 'match'
+self.records[1].count_10sec == array('q', [3, 4, 2])
 
 2. Tsung.process
     * ignore some transaction, listed in config file (set variables, use random etc)
-    * For all dict in self.data
+    * build run-wide time axis self.axis, every block timestamp is a row, see timeaxis.py
+    * For all records fill series aligned with self.axis, None - no data for the name in this block
 self.count = {
-    'tr_registration': {'timestamp': 1746469501, 'data': [CountData.count_10sec or Data.count_10sec list]},
-    'match': {'timestamp': 1746469501, 'data': [0, 0, 3, 4, 1, 0, 2]},
+    'tr_registration': [CounterRecords.count_10sec or DataRecords.count_10sec list],
+    'match': [None, None, 3, 4, 1, 0, 2],
 }
 self.mean = {
-    'tr_registration': {'timestamp': 1746469501, 'data': [Data.mean_10sec list]},
+    'tr_registration': [DataRecords.mean_10sec list],
 }
 
 3. Create table data.
@@ -101,23 +101,27 @@ charts = {
 }
 For each key (chart name) in this dict fill data:
 case 'match_rate':
-    # Matching report
-    lines_data = self.one_chart_data(self.names['match'],
-         lambda _name: {
-             'timestamp': self.count[_name]['timestamp'],
-             'data': [x / 10 for x in self.count[_name]['data']]
-         })
+    # Matching report, count per second (count_10sec / self.interval)
+    lines_data = self.one_chart_data(self.names['match'], self.rate_data, window)
 charts_data[chart_name]['data'] = lines_data
+charts_data[chart_name]['labels'] = json.dumps(self.labels(window))    # x values shared by all lines
 The charts_data will pass to create_report function.
 
 5.  create_report(log_dirname, log_datetime, tsung.tables(list(config['tables'])), tsung.charts(list(config['charts'])))
 """
-from collections import namedtuple
+from array import array
 import json
+import re
+import sys
 from collections.abc import Collection
 from pathlib import Path
 
-from utils import str_number, str_sec, number, str_bytes, str_bits_per_sec
+from correlation import MAX_LAG, cross_correlations, relationship, strongest
+from groups import MAX_CHART_SERIES, group_names, parse_groups, roll_up
+from phases import DEFAULT_TOLERANCE, Phase, PrefixSums, detect_phases
+from resample import DEFAULT_INTERVAL, WindowSpec, fit_window, parse_window_spec, window_factor, window_values
+from timeaxis import TimeAxis, first_row, present
+from utils import str_number, str_sec, str_bytes, str_bits_per_sec
 
 header7 = ['Name', 'Highest 10sec mean', 'Lowest 10sec mean', 'Highest Rate', 'Mean Rate', 'Mean', 'Count']
 tables = {
@@ -151,6 +155,12 @@ tables = {
         'header': ['Name', 'Max'],
         'data': []
     },
+    'group': {
+        'done': True,
+        'title': 'Transaction Groups Statistics',
+        'header': header7,
+        'data': []
+    },
     'main': {
         'done': True,
         'title': 'Main Statistics',
@@ -163,6 +173,12 @@ tables = {
         'header': ['Name', 'Highest Rate', 'Total'],
         'data': []
     },
+    'correlation': {
+        'done': True,
+        'title': 'Server metrics correlation with latency and errors',
+        'header': ['Name', 'Server metric', 'Correlation', 'Lag', 'Relationship'],
+        'data': []
+    },
     'server': {
         'done': True,
         'title': 'Server monitoring',
@@ -184,6 +200,12 @@ charts = {
         'yheader': 'transactions/sec',
         'data': []
     },
+    'groups_members': {
+        'title': 'Mean duration of {} transactions',
+        'xheader': 'time (sec of running test)',
+        'yheader': 'transaction duration (msec)',
+        'data': []
+    },
     'http_rate': {
         'title': 'HTTP code response rate',
         'xheader': 'time (sec of running test)',
@@ -252,8 +274,49 @@ charts = {
     },
 }
 
-Data = namedtuple('Data', 'name count_10sec mean_10sec stddev_10sec max min mean count')
-DataCounter = namedtuple('DataCounter', 'name count_10sec total')
+class DataRecords:
+    """Data fields of one name for all blocks with this name, numbers are stored in typed arrays."""
+    __slots__ = ('name', 'blocks', 'count_10sec', 'mean_10sec', 'stddev_10sec', 'max', 'min', 'mean', 'count')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.blocks = array('l')
+        self.count_10sec = array('q')
+        self.mean_10sec = array('d')
+        self.stddev_10sec = array('d')
+        self.max = array('d')
+        self.min = array('d')
+        self.mean = array('d')
+        self.count = array('q')
+
+    def append(self, block: int, words: list[str] | list[int | float]):
+        """Add values [count_10sec, mean_10sec, stddev_10sec, max, min, mean, count] (strings or numbers) of the block."""
+        self.blocks.append(block)
+        self.count_10sec.append(int(words[0]))
+        self.mean_10sec.append(float(words[1]))
+        self.stddev_10sec.append(float(words[2]))
+        self.max.append(float(words[3]))
+        self.min.append(float(words[4]))
+        self.mean.append(float(words[5]))
+        self.count.append(int(words[6]))
+
+
+class CounterRecords:
+    """Counter fields of one name for all blocks with this name, numbers are stored in typed arrays."""
+    __slots__ = ('name', 'blocks', 'count_10sec', 'total')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.blocks = array('l')
+        self.count_10sec = array('q')
+        self.total = array('q')
+
+    def append(self, block: int, words: list[str] | list[int | float]):
+        """Add values [count_10sec, total] (strings or numbers) of the block."""
+        self.blocks.append(block)
+        self.count_10sec.append(int(words[0]))
+        self.total.append(int(words[1]))
+
 
 class Tsung:
     DATA_FILE_NAME = 'tsung.log'
@@ -265,13 +328,17 @@ class Tsung:
     # no info about these transactions in report, please ignore:
 
     def __init__(self):
-        self.start_timestamp: int = 0    # int(self.data[0]['timestamp']) - начало теста
-        # self.data = [
-        #   {'timestamp': 1746441567},
-        #   {'timestamp': 1746441577, 'tr_rand_name': Data(name='tr_rand_name', count_10sec='3', mean_10sec='0.35333333333333333', stddev_10sec='0.10977654070378101', max='0.481', min='0.213', mean='0', count='0'), 'tr_get_host_name': Data(name='tr_get_host_name', count_10sec='1', mean_10sec='0.211', stddev_10sec='0', max='0.211', min='0.211', mean='0', count='0'), 'tr_profile': Data(name='tr_profile', count_10sec='1', mean_10sec='92.286', stddev_10sec='0', max='92.286', min='92.286', mean='0', count='0'), 'tr_cb_balance': Data(name='tr_cb_balance', count_10sec='2', mean_10sec='78.20349999999999', stddev_10sec='0.6774999999999984', max='78.881', min='77.526', mean='0', count='0'), 'tr_deposit': Data(name='tr_deposit', count_10sec='2', mean_10sec='210.4145', stddev_10sec='94.92249999999999', max='305.337', min='115.492', mean='0', count='0'), 'tr_cb_bet': Data(name='tr_cb_bet', count_10sec='1', mean_10sec='128.603', stddev_10sec='0', max='128.603', min='128.603', mean='0', count='0'), 'tr_cb_liveness': Data(name='tr_cb_liveness', count_10sec='2', mean_10sec='57.5655', stddev_10sec='0.23550000000000182', max='57.801', min='57.33', mean='0', count='0'), 'tr_set_var': Data(name='tr_set_var', count_10sec='1', mean_10sec='1.319', stddev_10sec='0', max='1.319', min='1.319', mean='0', count='0'), 'tr_game_init_by_alias_100hp': Data(name='tr_game_init_by_alias_100hp', count_10sec='1', mean_10sec='516.781', stddev_10sec='0', max='516.781', min='516.781', mean='0', count='0'), 'tr_registration': Data(name='tr_registration', count_10sec='1', mean_10sec='853.515', stddev_10sec='0', max='853.515', min='853.515', mean='0', count='0'), 'tr_cb_win': Data(name='tr_cb_win', count_10sec='1', mean_10sec='120.871', stddev_10sec='0', max='120.871', min='120.871', mean='0', count='0')},
-        #   {'timestamp': 1746441587, 'tr_rand_name': Data(name='tr_rand_name', count_10sec='17', mean_10sec='0.2787058823529412', stddev_10sec='0.08338201576858896', max='0.481', min='0.154', mean='0.35333333333333333', count='3'), 'tr_get_host_name': Data(name='tr_get_host_name', count_10sec='5', mean_10sec='0.09519999999999999', stddev_10sec='9.797958971132722e-4', max='0.211', min='0.094', mean='0.211', count='1'), 'tr_profile': Data(name='tr_profile', count_10sec='3', mean_10sec='68.70466666666668', stddev_10sec='1.733355192169859', max='92.286', min='67.252', mean='92.286', count='1'), 'tr_cb_balance': Data(name='tr_cb_balance', count_10sec='10', mean_10sec='219.93030000000005', stddev_10sec='423.06610577427494', max='1488.985', min='70.918', mean='78.20349999999999', count='2'), 'tr_deposit': Data(name='tr_deposit', count_10sec='10', mean_10sec='256.9764', stddev_10sec='177.17312444453867', max='742.261', min='115.492', mean='210.4145', count='2'), 'tr_cb_bet': Data(name='tr_cb_bet', count_10sec='11', mean_10sec='111.66672727272726', stddev_10sec='6.812481180503231', max='128.603', min='99.866', mean='128.603', count='1'), 'tr_cb_liveness': Data(name='tr_cb_liveness', count_10sec='11', mean_10sec='54.796', stddev_10sec='3.7567712442758854', max='60.75', min='50.013', mean='57.5655', count='2'), 'tr_set_var': Data(name='tr_set_var', count_10sec='5', mean_10sec='0.4328', stddev_10sec='0.025063120316512876', max='1.319', min='0.399', mean='1.319', count='1'), 'tr_game_init_by_alias_100hp': Data(name='tr_game_init_by_alias_100hp', count_10sec='2', mean_10sec='381.39', stddev_10sec='13.959999999999994', max='516.781', min='367.43', mean='516.781', count='1'), 'tr_registration': Data(name='tr_registration', count_10sec='5', mean_10sec='573.5674000000001', stddev_10sec='609.6595576200214', max='1792.548', min='253.876', mean='853.515', count='1'), 'tr_cb_win': Data(name='tr_cb_win', count_10sec='11', mean_10sec='117.02181818181818', stddev_10sec='6.741436531808092', max='129.156', min='104.488', mean='120.871', count='1')}
-        # ]
-        self.data = []
+        self.start_timestamp: int = 0    # self.timestamps[0] - начало теста
+        self.interval: int = DEFAULT_INTERVAL    # sec between dump blocks, tsung dumpstats_interval
+        self.axis = TimeAxis([])    # row position for every block timestamp, shared by all series
+        # block -> timestamp
+        self.timestamps = array('q')
+        # name id -> DataRecords or CounterRecords with values of the name from all blocks
+        self.records: list[DataRecords | CounterRecords] = []
+        # interned name -> name id
+        self.name_ids: dict[str, int] = {}
+        # word from tsung.log ('{cpu,"db1"}', 'tr_login') -> records, None for unknown names
+        self.records_by_word: dict[str, DataRecords | CounterRecords | None] = {}
         # all possible names in all records
         self.names = {
             'main': ('connect', 'page', 'request'),
@@ -285,20 +352,76 @@ class Tsung:
             'cpu': set(),
             'load': set(),
             'freemem': set(),
+            # roll-up of transactions by report.ini [tr_groups], see groups.py
+            'group': set(),
         }
         # { name1: [mean_10sec_vales], name2: [mean_10sec_vales], ... } for each name
         self.mean = {}
         # { name1: [count_10sec_vales], name2: [count_10sec_vales], ... } for each name
         self.count = {}
+        # group -> transactions of the group, transactions out of groups are drawn as separate lines
+        self.groups: dict[str, list[str]] = {}
+        self.single_transactions: list[str] = []
+        # ('count' | 'mean', name) -> PrefixSums, sums of any rows for tables of test phases
+        self.prefix: dict[tuple[str, str], PrefixSums] = {}
+        # (begin row, end row, max_lag) -> correlation rows, tables, export and catalog use the same summary
+        self.correlation_cache: dict[tuple[int, int, int], list[dict]] = {}
 
     def __str__(self):
-        return json.dumps(self.data)
-
+        return json.dumps({'timestamps': self.timestamps.tolist(), 'names': list(self.name_ids)})
+
+    def add_records(self, name: str, records_class: type) -> DataRecords | CounterRecords:
+        """Records of interned name, created at the first call."""
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[sys.intern(name)] = len(self.records)
+            self.records.append(records_class(name))
+        return self.records[name_id]
+
+    def records_for_word(self, word: str) -> DataRecords | CounterRecords | None:
+        """Choose records by the first word of tsung.log line, None if the line is not used in report."""
+        name = word
+        # transactions
+        if word.startswith(self.PREFIX_TRANSACTION):
+            # stats: tr_cb_login 149 106.13193288590601 9.39066762617517 235.81 93.45 107.17295945945946 74
+            records_class = DataRecords
+        # http return codes
+        elif word.isdigit():
+            # stats: 200 11 11
+            records_class = CounterRecords
+        # match records
+        elif 'match' in word:
+            # stats: nomatch 362 469
+            records_class = CounterRecords
+        # error records
+        elif 'error' in word:
+            # stats: error_json_unparsable 0 1
+            records_class = CounterRecords
+        # users record
+        elif word in self.names['users']:
+            # stats: users_count 1 1
+            records_class = CounterRecords
+        # network record
+        elif word in self.names['network']:
+            # stats: size_rcv 877293 1319453
+            records_class = CounterRecords
+        # main statistics
+        elif word in self.names['main']:
+            records_class = DataRecords
+        # server statistics
+        elif word.startswith('{'):
+            # stats: {load,"tsung_controller@f6f41ca75a60"} 1 0.26953125 0.0 0.3203125 0.26953125 0.3203125 1
+            name = word[1:-2].replace(',"', '@')
+            records_class = DataRecords
+        else:
+            return None
+        return self.add_records(name, records_class)
 
     def parse(self, dirpath: str | Path):
         """Parse tsung.log from dirpath."""
         filename = Path(dirpath).resolve() / self.DATA_FILE_NAME
-        data = {}
+        block = -1
+        records_by_word = self.records_by_word
         with open(filename, 'r') as fin:
             for line in fin:
                 line = line.strip()
@@ -308,104 +431,89 @@ class Tsung:
                 # block header with timestamp
                 if line.startswith(self.PREFIX_HEADER):
                     # '# stats: dump at 1746469501' - get timestamp
-                    if data:
-                        self.data.append(data)
-                    data = {'timestamp': int(line[self.PREFIX_HEADER_LENGTH:])}
+                    self.timestamps.append(int(line[self.PREFIX_HEADER_LENGTH:]))
+                    block += 1
                     continue
-
-                # skip line up to name
-                line = line[self.PREFIX_DATA_SKIP:]
-                if line.startswith(self.PREFIX_TRANSACTION):
-                    # 'stats: tr_cb_login 149 106.13193288590601 9.39066762617517 235.81 93.45 107.17295945945946 74'
-                    words = line.split()
-                    d = Data(words[0], *map(number, words[1:]))
-                    data[d.name] = d
+                # no block header yet
+                if block < 0:
                     continue
 
-                words = line.split()
-                # print(f'{words=}')
-                name = words[0]
-
-                # http return codes
-                if name.isdigit():
-                    # stats: 200 11 11
-                    d = DataCounter(*words)
-                    data[name] = d
-
-                # match records
-                elif 'match' in name:
-                    # stats: nomatch 362 469
-                    d = DataCounter(*words)
-                    data[name] = d
-
-                # error records
-                elif 'error' in name:
-                    # stats: error_json_unparsable 0 1
-                    d = DataCounter(*words)
-                    data[name] = d
-
-                # users record
-                elif name in self.names['users']:
-                    # stats: users_count 1 1
-                    d = DataCounter(*words)
-                    data[name] = d
-
-                # network record
-                elif name in self.names['network']:
-                    # stats: users_count 1 1
-                    d = DataCounter(*words)
-                    data[name] = d
-
-                # main statistics
-                elif name in self.names['main']:
-                    d = Data(name, *map(number, words[1:]))
-                    data[name] = d
-
-                # server statistics
-                elif name.startswith('{'):
-                    # stats: {load,"tsung_controller@f6f41ca75a60"} 1 0.26953125 0.0 0.3203125 0.26953125 0.3203125 1
-                    name = name[1:-2].replace(',"', '@')
-                    d = Data(name, *map(number, words[1:]))
-                    data[name] = d
-
-        self.data.append(data)
-        # print(json.dumps(self.data, indent=4))
-
-    def process(self, ignore_transactions: Collection[str] | None = None):
-        """Calculate mean and rate lists."""
-        ignore_transactions = ignore_transactions or []
+                # skip line up to name
+                words = line[self.PREFIX_DATA_SKIP:].split()
+                word = words[0]
+                if word in records_by_word:
+                    records = records_by_word[word]
+                else:
+                    records = records_by_word[word] = self.records_for_word(word)
+                if records is not None:
+                    records.append(block, words[1:])
+
+    def process(self, ignore_transactions: Collection[str] | None = None,
+                transaction_groups: dict[str, str | None] | None = None):
+        """Calculate mean and rate lists, transaction_groups - report.ini [tr_groups] section."""
+        ignore_transactions = set(ignore_transactions or ())
         
         # Collect all names by categories
-        for block in self.data:
-            for name in block:
-                self.add_name_by_category(name)
+        for records in self.records:
+            self.add_name_by_category(records.name)
         # some transactions should be ignored
         self.names['transaction'] -= ignore_transactions
 
-        self.start_timestamp = int(self.data[0]['timestamp'])
-        all_names = [name for category, names in self.names.items() for name in names]
-        print(f'{all_names=}')
-        for name in all_names:
-            for block in self.data:
-                timestamp = int(block['timestamp'])
-                d = block.get(name)
-                if not d:
-                    continue
-                # the first value for this name
-                if not self.count.get(name):
-                    self.count[name]= {'timestamp': timestamp, 'data': []}
-                self.count[name]['data'].append(int(d.count_10sec))
-
-                # only Data, not DataCount has mean_10sec value
-                if len(d) > 3:
-                    if not self.mean.get(name):
-                        self.mean[name]= {'timestamp': timestamp, 'data': []}
-                    self.mean[name]['data'].append(d.mean_10sec)
+        self.start_timestamp = self.timestamps[0]
+        self.axis = TimeAxis(self.timestamps)
+        self.interval = self.axis.interval
+        # block -> row of time axis
+        rows = [self.axis.row(timestamp) for timestamp in self.timestamps]
+        all_names = {name for category, names in self.names.items() for name in names}
+        print(f'{all_names=}', file=sys.stderr)
+        for records in self.records:
+            name = records.name
+            if name not in all_names:
+                continue
+            count = self.count[name] = self.axis.series()
+            for block, value in zip(records.blocks, records.count_10sec):
+                count[rows[block]] = value
+
+            # only DataRecords, not CounterRecords have mean_10sec values
+            if isinstance(records, DataRecords):
+                mean = self.mean[name] = self.axis.series()
+                for block, value in zip(records.blocks, records.mean_10sec):
+                    mean[rows[block]] = value
 
         # print(f'mean: {self.mean}')
-        print(f'mean keys: {self.mean.keys()}')
-        print(f'count keys: {self.count.keys()}')
+        print(f'mean keys: {self.mean.keys()}', file=sys.stderr)
+        print(f'count keys: {self.count.keys()}', file=sys.stderr)
         # print(f'count: {self.count}')
+        self.group_transactions(parse_groups(transaction_groups or {}))
+
+    def group_transactions(self, rules: dict, max_series: int = MAX_CHART_SERIES):
+        """Count and count-weighted mean series of transaction groups, see groups.py."""
+        names = self.names_with_data('transaction')
+        totals = {name: self.prefix_sums('count', name).sum() for name in names}
+        self.groups, self.single_transactions = group_names(names, rules, totals, max_series)
+        for group, members in self.groups.items():
+            if group in self.count:
+                raise ValueError(f'Transaction group "{group}" has the same name as a transaction')
+            self.count[group], self.mean[group] = roll_up([self.count[name] for name in members],
+                                                          [self.mean[name] for name in members])
+            self.names['group'].add(group)
+
+    def columns(self) -> dict[str, list]:
+        """Processed series as columns, one row per name and block with data (for export)."""
+        columns = {'category': [], 'name': [], 'timestamp': [], 'count': [], 'mean': []}
+        for category, names in self.names.items():
+            for name in sorted(names):
+                if name not in self.count:
+                    continue
+                count = self.count[name]
+                mean = self.mean.get(name) or self.axis.series()
+                rows = [row for row, value in enumerate(count) if value is not None]
+                columns['category'].extend([category] * len(rows))
+                columns['name'].extend([name] * len(rows))
+                columns['timestamp'].extend(self.axis.timestamp(row) for row in rows)
+                columns['count'].extend(count[row] for row in rows)
+                columns['mean'].extend(None if mean[row] is None else float(mean[row]) for row in rows)
+        return columns
 
     def add_name_by_category(self, name: str):
         """Add name to self.names."""
@@ -426,255 +534,360 @@ class Tsung:
         elif name.startswith('freemem') :
             self.names['freemem'].add(name)
 
-    def duration(self, timestamp):
-        """Duration in sec from timestamp till self.data[-1]['timestamp']"""
-        return int(self.data[-1]['timestamp']) - int(timestamp)
-
-    def tables(self, table_list: list[str]):
-        """Fill tables dictionary after parsing and return it."""
-        table = {key: value for key, value in tables.items() if key in table_list}
+    def names_with_data(self, category: str) -> list[str]:
+        """Sorted names of category which are present in the log."""
+        return sorted(name for name in self.names[category] if name in self.count)
+
+    def end_timestamp(self, rows: slice = slice(None)) -> int:
+        """Timestamp of the last row of rows, the last block timestamp if rows are till the end of test."""
+        _, end, _ = rows.indices(len(self.axis))
+        if end >= len(self.axis):
+            return self.timestamps[-1]
+        return self.axis.timestamp(end - 1)
+
+    def duration(self, timestamp, rows: slice = slice(None)):
+        """Duration in sec from timestamp till the last block timestamp (of rows)"""
+        return self.end_timestamp(rows) - int(timestamp)
+
+    def prefix_sums(self, series: str, name: str) -> PrefixSums:
+        """Prefix sums of counts ('count') or of means of intervals with requests ('mean') of name, cached."""
+        key = (series, name)
+        if key not in self.prefix:
+            if series == 'count':
+                values = self.count[name]
+            else:
+                values = [mean if count else None for mean, count in zip(self.mean[name], self.count[name])]
+            self.prefix[key] = PrefixSums(values)
+        return self.prefix[key]
+
+    def phases(self, tolerance: float = DEFAULT_TOLERANCE) -> list[Phase]:
+        """Ramp-up, plateau and ramp-down by simultaneous users, see phases.py."""
+        for name in ('users', 'connected'):
+            if name in self.count:
+                return detect_phases(self.count[name], tolerance)
+        return []
+
+    def correlations(self, rows: slice = slice(None), max_lag: int = MAX_LAG) -> list[dict]:
+        """The strongest lagged correlations of cpu, load, freemem with transaction latency and error rates."""
+        begin, end, _ = rows.indices(len(self.axis))
+        key = (begin, end, max_lag)
+        if key not in self.correlation_cache:
+            self.correlation_cache[key] = self.correlation_rows(rows, max_lag)
+        return self.correlation_cache[key]
+
+    def correlation_rows(self, rows: slice, max_lag: int) -> list[dict]:
+        """Correlations of rows without cache, see correlation.py."""
+        resources = {name: self.mean[name][rows]
+                     for category in ('cpu', 'load', 'freemem') for name in self.names_with_data(category)}
+        # name -> (kind, values), latency only of intervals with requests
+        targets = {name: ('latency', [mean if count else None
+                                      for mean, count in zip(self.mean[name][rows], self.count[name][rows])])
+                   for name in self.names_with_data('transaction')}
+        targets |= {name: ('rate', self.count[name][rows]) for name in self.names_with_data('error')}
+        correlations = cross_correlations(resources, {name: values for name, (_, values) in targets.items()},
+                                          max_lag // self.interval)
+        # name is unique per pair: export, catalog and SLA rules key rows by table and name
+        return [{
+            'name': f'{name}@{resource}',
+            'transaction': name,
+            'resource': resource,
+            'kind': targets[name][0],
+            'correlation': correlation,
+            'lag': lag * self.interval,
+        } for resource, name, lag, correlation in strongest(correlations)]
+
+    def summary(self, table_list: list[str], rows: slice = slice(None)) -> dict[str, list[dict]]:
+        """Numeric values of tables rows, durations in msec, rates per sec, network in bytes.
+
+        rows - slice of self.axis rows (test phase), the whole test by default.
+        {
+            'transaction': [{'name': 'tr_login', 'highest_mean': 132.3, 'lowest_mean': 97.8, 'highest_rate': 14.6,
+                             'mean_rate': 10.2, 'mean': 110.6, 'count': 1460}, ...],
+            'http': [{'name': '200', 'highest_rate': 59.5, 'mean_rate': 41.7, 'total': 12500}, ...],
+        }
+        """
+        summary = {}
 
-        # Total test duration in sec
-        total_duration = self.duration(self.start_timestamp)
+        # Total test (phase) duration in sec
+        begin = rows.indices(len(self.axis))[0]
+        total_duration = self.duration(self.axis.timestamp(begin) if begin else self.start_timestamp, rows)
 
         for table_name in table_list:
+            table_rows = []
             match table_name:
-                case 'transaction':
-                    d = []
-                    for name in sorted(self.names['transaction']):
-                        values_without_zero = [value for value, count in zip(self.mean[name]['data'], self.count[name]['data']) if count > 0]
-                        # print(f'{name=} {values_without_zero=}')
-                        highest_mean = max(values_without_zero)
-                        lowest_mean = min(values_without_zero)
-                        mean = sum(values_without_zero) / len(values_without_zero)
-
-                        total = sum(self.count[name]['data'])
-                        rates = [count/10 for count in self.count[name]['data']]
-                        highest_rate = max(rates)
-                        mean_rate = sum(rates) / len(rates)
-                        d.append([name,
-                                  str_sec(highest_mean), str_sec(lowest_mean),
-                                  str_number(highest_rate, 2, '/sec'), str_number(mean_rate, 2, '/sec'),
-                                  str_sec(mean), total])
-                    table['transaction']['data'] = d
-
-                case 'main':
+                case 'transaction' | 'main' | 'group':
                     # main statistics (same as transactions)
-                    d = []
-                    for name in sorted(self.names['main']):
-                        values_without_zero = [value for value, count in zip(self.mean[name]['data'], self.count[name]['data']) if count > 0]
+                    for name in self.names_with_data(table_name):
+                        counts = self.prefix_sums('count', name)
+                        means = self.prefix_sums('mean', name)
+                        if not means.count(rows):
+                            continue
+                        values_without_zero = present(
+                            mean if count else None for mean, count in zip(self.mean[name][rows], self.count[name][rows]))
                         # print(f'{name=} {values_without_zero=}')
-                        highest_mean = max(values_without_zero)
-                        lowest_mean = min(values_without_zero)
-                        mean = sum(values_without_zero) / len(values_without_zero)
-
-                        total = sum(self.count[name]['data'])
-                        rates = [count/10 for count in self.count[name]['data']]
-                        highest_rate = max(rates)
-                        mean_rate = sum(rates) / len(rates)
-                        d.append([name,
-                                  str_sec(highest_mean), str_sec(lowest_mean),
-                                  str_number(highest_rate, 2, '/sec'), str_number(mean_rate, 2, '/sec'),
-                                  str_sec(mean), total])
-                    table['main']['data'] = d
-
-                case 'match':
+                        table_rows.append({
+                            'name': name,
+                            'highest_mean': max(values_without_zero),
+                            'lowest_mean': min(values_without_zero),
+                            'highest_rate': max(present(self.count[name][rows])) / self.interval,
+                            'mean_rate': counts.sum(rows) / counts.count(rows) / self.interval,
+                            'mean': means.sum(rows) / means.count(rows),
+                            'count': counts.sum(rows),
+                        })
+
+                case 'match' | 'http':
                     # matching report (same as http table, except name)
-                    d = []
-                    for name in sorted(self.names['match']):
-                        total = sum(self.count[name]['data'])
-                        rate_without_zero = [count/10 for count in self.count[name]['data'] if count > 0]
-                        highest_rate = max(rate_without_zero)
-                        mean_rate = total / total_duration
-                        d.append([name,
-                                  str_number(highest_rate, 2, '/sec'), str_number(mean_rate, 2, '/sec'),
-                                  total])
-                    table['match']['data'] = d
+                    for name in self.names_with_data(table_name):
+                        counts = self.prefix_sums('count', name)
+                        if not counts.count(rows):
+                            continue
+                        total = counts.sum(rows)
+                        if table_name == 'http':
+                            # _total_duration = len(rate_without_zero) * self.interval
+                            first = begin + first_row(self.count[name][rows])
+                            _total_duration = self.duration(self.axis.timestamp(first), rows)
+                        else:
+                            _total_duration = total_duration
+                        table_rows.append({
+                            'name': name,
+                            'highest_rate': max(present(self.count[name][rows])) / self.interval,
+                            'mean_rate': total / (_total_duration or self.interval),
+                            'total': total,
+                        })
+
+                case 'error' | 'network':
+                    # Errors, Network (same as Errors)
+                    for name in self.names_with_data(table_name):
+                        counts = self.prefix_sums('count', name)
+                        if not counts.count(rows):
+                            continue
+                        table_rows.append({
+                            'name': name,
+                            'highest_rate': max(present(self.count[name][rows])) / self.interval,
+                            'total': counts.sum(rows),
+                        })
 
-                case 'http':
-                    # HTTP return code
-                    d = []
-                    for name in sorted(self.names['http']):
-                        total = sum(self.count[name]['data'])
-                        rate_without_zero = [count/10 for count in self.count[name]['data'] if count > 0]
-                        highest_rate = max(rate_without_zero)
-                        # _total_duration = len(rate_without_zero) * 10
-                        _total_duration = self.duration(self.count[name]['timestamp'])
-                        mean_rate = total / _total_duration
-                        d.append([name,
-                                  str_number(highest_rate, 2, '/sec'), str_number(mean_rate, 2, '/sec'),
-                                  total])
-                    table['http']['data'] = d
+                case 'users':
+                    # Users
+                    for name in self.names_with_data('users'):
+                        values = present(self.count[name][rows])
+                        if values:
+                            table_rows.append({'name': name, 'max': max(values)})
+
+                case 'server':
+                    # Server (aggregate tabel for cpu, load, freemem)
+                    for category in ('cpu', 'load', 'freemem'):
+                        for name in self.names_with_data(category):
+                            values = present(self.mean[name][rows])
+                            if not values:
+                                continue
+                            table_rows.append({
+                                'name': name,
+                                'category': category,
+                                'highest_mean': max(values),
+                                'lowest_mean': min(values),
+                            })
+
+                case 'correlation':
+                    # Server metrics vs transaction latency and error rates, see correlation.py
+                    table_rows = self.correlations(rows)
+
+                case _:
+                    raise ValueError(f'Unknown table "{table_name}"')
+            summary[table_name] = table_rows
+
+        return summary
+
+    def tables(self, table_list: list[str], rows: slice = slice(None)):
+        """Fill tables dictionary after parsing and return it, rows - slice of self.axis rows (test phase)."""
+        table = {key: dict(value) for key, value in tables.items() if key in table_list}
+        server_units = {'cpu': (2, '%'), 'load': (2, ''), 'freemem': (0, ' MB')}
+
+        for table_name, rows in self.summary(table_list, rows).items():
+            match table_name:
+                case 'transaction' | 'main' | 'group':
+                    d = [[row['name'],
+                          str_sec(row['highest_mean']), str_sec(row['lowest_mean']),
+                          str_number(row['highest_rate'], 2, '/sec'), str_number(row['mean_rate'], 2, '/sec'),
+                          str_sec(row['mean']), row['count']] for row in rows]
+
+                case 'match' | 'http':
+                    d = [[row['name'],
+                          str_number(row['highest_rate'], 2, '/sec'), str_number(row['mean_rate'], 2, '/sec'),
+                          row['total']] for row in rows]
 
                 case 'error':
-                    # Errors
-                    d = []
-                    for name in sorted(self.names['error']):
-                        total = sum(self.count[name]['data'])
-                        rate_without_zero = [count/10 for count in self.count[name]['data'] if count > 0]
-                        highest_rate = max(rate_without_zero)
-                        d.append([name,
-                                  str_number(highest_rate, 2, '/sec'),
-                                  total])
-                    table['error']['data'] = d
+                    d = [[row['name'], str_number(row['highest_rate'], 2, '/sec'), row['total']] for row in rows]
 
                 case 'network':
-                    # Network (same as Errors)
-                    d = []
-                    for name in sorted(self.names['network']):
-                        total = sum(self.count[name]['data'])
-                        rate_without_zero = [count/10 for count in self.count[name]['data'] if count > 0]
-                        highest_rate = max(rate_without_zero)
-                        d.append([name,
-                                  str_bits_per_sec(highest_rate),
-                                  str_bytes(total)])
-                    table['network']['data'] = d
+                    d = [[row['name'], str_bits_per_sec(row['highest_rate']), str_bytes(row['total'])] for row in rows]
 
                 case 'users':
-                    # Users
-                    d = []
-                    for name in sorted(self.names['users']):
-                        max_value = max(self.count[name]['data'])
-                        d.append([name,
-                                  max_value])
-                    table['users']['data'] = d
+                    d = [[row['name'], row['max']] for row in rows]
+
+                case 'correlation':
+                    d = [[row['transaction'], row['resource'], f"{row['correlation']:.2f}", f"{row['lag']} sec",
+                          relationship(row['transaction'], row['kind'], row['resource'], row['lag'], row['correlation'])]
+                         for row in rows]
 
                 case 'server':
-                    # Server (aggregate tabel for cpu, load, freemem)
                     d = []
-                    for name in sorted(self.names['cpu']):
-                        max_value = max(self.mean[name]['data'])
-                        min_value = min(self.mean[name]['data'])
-                        d.append([name, str_number(max_value, accuracy=2, unit='%'), str_number(min_value, accuracy=2, unit='%')])
-                    for name in sorted(self.names['load']):
-                        max_value = max(self.mean[name]['data'])
-                        min_value = min(self.mean[name]['data'])
-                        d.append([name, str_number(max_value, accuracy=2), str_number(min_value, accuracy=2)])
-                    for name in sorted(self.names['freemem']):
-                        max_value = max(self.mean[name]['data'])
-                        min_value = min(self.mean[name]['data'])
-                        d.append([name, str_number(max_value, accuracy=0, unit=' MB'), str_number(min_value, accuracy=0, unit=' MB')])
-                    table['server']['data'] = d
-
-                case _:
-                    raise ValueError(f'Unknown table "{table_name}"')
+                    for row in rows:
+                        accuracy, unit = server_units[row['category']]
+                        d.append([row['name'],
+                                  str_number(row['highest_mean'], accuracy=accuracy, unit=unit),
+                                  str_number(row['lowest_mean'], accuracy=accuracy, unit=unit)])
+            table[table_name]['data'] = d
 
         return table
 
-    def one_chart_data(self, names: Collection[str], get_data_by_name) -> list[dict]:
-        """Build (x,y) data for all chart series by names and get_data_by_name function."""
+    def one_chart_data(self, names: Collection[str], get_data_by_name, window: WindowSpec | None = None,
+                       rows: slice = slice(None)) -> list[dict]:
+        """Build y data for all chart series by names and get_data_by_name function.
+
+        get_data_by_name returns {'data': values aligned with self.axis} and optional
+        'weights' (counts) for count-weighted resampling of means.
+        window - resample and rolling spec, parsed from report.ini [resample] section ('1min', '30s max 5min').
+        rows - slice of self.axis rows (zoom), all rows by default.
+        x values are the same for all series, see self.labels(window).
+        """
         lines_data = []
-        for name in sorted(names):
+        for name in sorted(name for name in names if name in self.count):
             data = get_data_by_name(name)
-            y = data['data']
-            ylen = len(y)
-            x0 = (data['timestamp'] - self.start_timestamp)
-            points = [{'x': x, 'y': y} for x, y in zip(range(x0, x0 + ylen * 10, 10), y)]
+            weights = data.get('weights')
+            values = window_values(data['data'][rows], self.interval, window,
+                                   None if weights is None else weights[rows])
 
             line_data = {
                 "label": name,
                 "fill": False,
                 "tension": 0,
-                "data": points
+                "data": values
             }
             lines_data.append(line_data)
 
         return lines_data
 
-    def charts(self, chart_list: list[str]):
-        """Fill charts dictionary after parsing and return it."""
-        charts_data = {key: value for key, value in charts.items() if key in chart_list}
+    def labels(self, window: WindowSpec | None = None, rows: slice = slice(None)) -> list[int]:
+        """x values (sec of running test) shared by all series of a chart with this window."""
+        return self.axis.labels(window_factor(self.interval, window), rows)
+
+    def chart_rows(self, time_range: tuple[int | None, int | None] | None = None) -> slice:
+        """Rows of charts for time_range (begin, end) in sec of running test, all rows by default."""
+        if time_range is None:
+            return slice(None)
+        return self.axis.slice(*time_range)
+
+    def mean_data(self, name: str) -> dict:
+        """Mean values of name weighted by counts of the same intervals."""
+        return {
+            'data': self.mean[name],
+            'weights': self.count[name]
+        }
+
+    def rate_data(self, name: str, multiplier: float = 1) -> dict:
+        """Counts of name per second (multiplied by multiplier)."""
+        return {
+            'data': [None if x is None else x * multiplier / self.interval for x in self.count[name]]
+        }
+
+    def group_chart_names(self) -> dict[str, str]:
+        """{chart name: group} of drill-down charts, chart name is a part of JS variable names.
+
+        Groups 'a-b' and 'a b' are both 'a_b' in JS names, the index of the group keeps chart names unique.
+        """
+        return {f'groups_members_{re.sub(r"[^0-9A-Za-z_]", "_", group)}_{index}': group
+                for index, group in enumerate(sorted(self.groups))}
+
+    def charts(self, chart_list: list[str], windows: dict[str, str] | None = None,
+               time_range: tuple[int | None, int | None] | None = None, max_points: int | None = None):
+        """Fill charts dictionary after parsing and return it.
+
+        windows - {chart_name: window spec} from report.ini [resample] section.
+        time_range - (begin, end) sec of running test, zoom of all charts.
+        max_points - resample to wider window if there are more points in time_range (see server.py).
+        """
+        windows = windows or {}
+        # drill-down: groups_members is one chart per transaction group
+        group_charts = self.group_chart_names()
+        chart_list = [name for chart_name in chart_list
+                      for name in (group_charts if chart_name == 'groups_members' else [chart_name])]
+        charts_data = {key: dict(value) for key, value in charts.items() if key in chart_list}
+        for chart_name, group in group_charts.items():
+            if chart_name in chart_list:
+                charts_data[chart_name] = dict(charts['groups_members'], title=charts['groups_members']['title'].format(group))
+        rows = self.chart_rows(time_range)
+        length = len(range(*rows.indices(len(self.axis))))
+        # groups and transactions out of groups, at most MAX_CHART_SERIES lines
+        transactions = list(self.groups) + self.single_transactions
 
         for chart_name in chart_list:
             lines_data = None
+            window_name = 'groups_members' if chart_name in group_charts else chart_name
+            window = fit_window(parse_window_spec(windows.get(window_name)), self.interval, length, max_points)
             match chart_name:
                 case 'transactions_mean':
-                    # Mean transaction duration
-                    lines_data = self.one_chart_data(self.names['transaction'], lambda name: self.mean[name])
+                    # Mean transaction (group) duration
+                    lines_data = self.one_chart_data(transactions, self.mean_data, window, rows)
 
                 case 'transactions_rate':
-                    # Transaction rate
-                    lines_data = self.one_chart_data(self.names['transaction'],
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
+                    # Transaction (group) rate
+                    lines_data = self.one_chart_data(transactions, self.rate_data, window, rows)
 
                 case 'main':
                     # Main duration
-                     lines_data = self.one_chart_data(('connect', 'request'), lambda name: self.mean[name])
+                     lines_data = self.one_chart_data(('connect', 'request'), self.mean_data, window, rows)
 
                 case 'main_rate':
                     # Main rate
-                    lines_data = self.one_chart_data(('connect', 'request'),
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
+                    lines_data = self.one_chart_data(('connect', 'request'), self.rate_data, window, rows)
 
                 case 'network':
                     # Network rate
                     lines_data = self.one_chart_data(self.names['network'],
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             # byte -> bit (*8) -> Kbit (/1024) -> per second (/10)
-                             'data': [x * 8 / 10 / 1024 for x in self.count[_name]['data']]
-                         })
+                         # byte -> bit (*8) -> Kbit (/1024) -> per second
+                         lambda _name: self.rate_data(_name, 8 / 1024),
+                         window, rows)
 
                 case 'match_rate':
                     # Matching report
-                    lines_data = self.one_chart_data(self.names['match'],
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
+                    lines_data = self.one_chart_data(self.names['match'], self.rate_data, window, rows)
 
                 case 'http_rate':
                     # HTTP Code Response Rate
-                    lines_data = self.one_chart_data(self.names['http'],
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
+                    lines_data = self.one_chart_data(self.names['http'], self.rate_data, window, rows)
 
                 case 'error_rate':
                     # Error rate
-                    lines_data = self.one_chart_data(self.names['error'],
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
+                    lines_data = self.one_chart_data(self.names['error'], self.rate_data, window, rows)
 
                 case 'users':
                     # Simultaneous Users
-                    lines_data = self.one_chart_data(('users', 'connected'),
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x for x in self.count[_name]['data']]
-                         })
+                    lines_data = self.one_chart_data(('users', 'connected'), lambda name: {'data': self.count[name]}, window, rows)
 
                 case 'users_arrival':
                     # User arrival/depature rate
-                    lines_data = self.one_chart_data(('users_count', 'finish_users_count'),
-                         lambda _name: {
-                             'timestamp': self.count[_name]['timestamp'],
-                             'data': [x / 10 for x in self.count[_name]['data']]
-                         })
-                    print(f'users_arrival len={len(lines_data)}')
+                    lines_data = self.one_chart_data(('users_count', 'finish_users_count'), self.rate_data, window, rows)
+                    print(f'users_arrival len={len(lines_data)}', file=sys.stderr)
 
                 case 'cpu':
                     # Mean cpu%
-                    lines_data = self.one_chart_data(self.names['cpu'], lambda name: self.mean[name])
+                    lines_data = self.one_chart_data(self.names['cpu'], self.mean_data, window, rows)
 
                 case 'load':
                     # Mean load
-                    lines_data = self.one_chart_data(self.names['load'], lambda name: self.mean[name])
+                    lines_data = self.one_chart_data(self.names['load'], self.mean_data, window, rows)
 
                 case 'freemem':
                     # Mean freemem
-                    lines_data = self.one_chart_data(self.names['freemem'], lambda name: self.mean[name])
+                    lines_data = self.one_chart_data(self.names['freemem'], self.mean_data, window, rows)
+
+                case _ if chart_name in group_charts:
+                    # Mean duration of transactions of one group
+                    lines_data = self.one_chart_data(self.groups[group_charts[chart_name]], self.mean_data, window, rows)
 
             charts_data[chart_name]['data'] = lines_data
             charts_data[chart_name]['json'] = json.dumps(lines_data)
+            charts_data[chart_name]['labels'] = json.dumps(self.labels(window, rows))
 
         return charts_data